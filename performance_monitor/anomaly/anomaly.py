@@ -0,0 +1,117 @@
+from collections.abc import Iterable
+from datetime import datetime
+from math import sqrt
+
+from sqlmodel import desc, select
+
+from performance_monitor.anomaly.model import AnomalyEvent
+from performance_monitor.common_repo import BasePerformanceModel, get_filed_name
+from performance_monitor.config import (
+    ANOMALY_EWMA_ALPHA,
+    ANOMALY_MIN_ABSOLUTE_DEVIATION,
+    ANOMALY_MIN_RELATIVE_DEVIATION,
+    ANOMALY_WARMUP_SAMPLES,
+    ANOMALY_Z_SCORE_THRESHOLD,
+)
+from performance_monitor.db import get_async_session
+
+SPIKE = "spike"
+COLLAPSE = "collapse"
+
+
+class EWMAState:
+    """
+    Exponentially weighted mean and variance of one series, updated in constant time and memory.
+    """
+
+    __slots__ = ("mean", "variance", "samples")
+
+    def __init__(self) -> None:
+        self.mean = 0.0
+        self.variance = 0.0
+        self.samples = 0
+
+    def score(self, value: float, min_deviation: float) -> float:
+        # the floors keep flat (relative) and idle (absolute) series from flagging every small wobble
+        deviation = max(sqrt(self.variance), abs(self.mean) * ANOMALY_MIN_RELATIVE_DEVIATION, min_deviation, 1e-9)
+        return (value - self.mean) / deviation
+
+    def update(self, value: float) -> None:
+        if self.samples == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = ANOMALY_EWMA_ALPHA * diff
+            self.mean += increment
+            self.variance = (1 - ANOMALY_EWMA_ALPHA) * (self.variance + diff * increment)
+        self.samples += 1
+
+
+class AnomalyDetector:
+    def __init__(self) -> None:
+        self.states: dict[tuple[str, str, str], EWMAState] = {}
+
+    def check(self, source: str, name: str, time: datetime, metric: str, kind: str, value: float):
+        state = self.states.setdefault((source, name, metric), EWMAState())
+        event = None
+        min_deviation = ANOMALY_MIN_ABSOLUTE_DEVIATION.get(metric, 0.0)
+        if state.samples >= ANOMALY_WARMUP_SAMPLES:
+            score = state.score(value, min_deviation)
+            # a spike must reach a noticeable value, a collapse must come from one
+            if (kind == SPIKE and score > ANOMALY_Z_SCORE_THRESHOLD and value >= min_deviation) or (
+                kind == COLLAPSE and score < -ANOMALY_Z_SCORE_THRESHOLD and state.mean >= min_deviation
+            ):
+                event = AnomalyEvent(
+                    source=source,
+                    name=name,
+                    time=time,
+                    metric=metric,
+                    kind=kind,
+                    value=value,
+                    expected=round(state.mean, 2),
+                    score=round(score, 2),
+                )
+        state.update(value)
+        return event
+
+    def detect(self, rows: Iterable[BasePerformanceModel]) -> list[AnomalyEvent]:
+        events: list[AnomalyEvent] = []
+        for row in rows:
+            source = row.__tablename__
+            for kind, fields in (
+                (SPIKE, row.get_fields_must_be_checked_for_spike()),
+                (COLLAPSE, row.get_fields_must_be_checked_for_collapse()),
+            ):
+                for field in fields:
+                    metric = get_filed_name(field)
+                    event = self.check(source, row.name, row.time, metric, kind, getattr(row, metric))
+                    if event is not None:
+                        events.append(event)
+        return events
+
+
+detector = AnomalyDetector()
+
+
+def detect_anomalies(rows: Iterable[BasePerformanceModel]) -> list[AnomalyEvent]:
+    """
+    Feed freshly built rows to the collector-wide detector and return the anomalies they raise.
+    """
+    return detector.detect(rows)
+
+
+async def get_anomaly_events(
+    source: str | None,
+    name: str,
+    start: datetime,
+    end: datetime,
+    limit: int,
+) -> list[AnomalyEvent]:
+    async with get_async_session() as session:
+        statement = select(AnomalyEvent).where(AnomalyEvent.time >= start, AnomalyEvent.time <= end)
+        if source:
+            statement = statement.where(AnomalyEvent.source == source)
+        if name:
+            statement = statement.where(AnomalyEvent.name == name)
+        result_ = await session.execute(statement.order_by(desc(AnomalyEvent.time)).limit(limit))
+        return list(result_.scalars().all())
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class AnomalyEvent(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    source: str = Field(index=True)
+    name: str
+    time: datetime = Field(index=True)
+    metric: str
+    kind: str
+    value: float
+    expected: float
+    score: float
@@ -0,0 +1,172 @@
+"""
+On-demand high-frequency sampling of selected LUNs and FC targets.
+
+Bursts run inside the API process and keep their samples in a per-entity in-memory ring for
+`BURST_RETENTION_SECONDS`, so they never write to the database or disturb the regular collectors.
+The collector modules the samplers are built from are only imported when a burst starts, so they stay
+out of the API's startup.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Type
+
+from performance_monitor.common_repo import BasePerformanceModel, get_filed_name, refactore_result
+from performance_monitor.config import (
+    BURST_MAX_DURATION,
+    BURST_MAX_SESSIONS,
+    BURST_MIN_INTERVAL_MS,
+    BURST_RETENTION_SECONDS,
+)
+
+MAX_SAMPLES_PER_ENTITY = BURST_MAX_DURATION * 1000 // BURST_MIN_INTERVAL_MS
+
+Sampler = Callable[[], Awaitable[list[BasePerformanceModel]]]
+
+rings: dict[tuple[str, str], deque[BasePerformanceModel]] = {}
+burst_tasks: set[asyncio.Task] = set()
+# sessions running or being set up, reserved before the sampler is built since that awaits lvs/sysfs
+reserved_sessions = 0
+
+
+async def read_diskstats(kernel_names: dict[str, str]) -> tuple[datetime, dict[str, list[int]]]:
+    from performance_monitor.ethernet_and_fiber_channel.ethernet_and_fiber_channel import read_file_content
+    from performance_monitor.pool_and_lun.pool_and_lun import parse_diskstats
+
+    now = datetime.now()
+    diskstats = parse_diskstats((await read_file_content(Path("/proc/diskstats"))).splitlines())
+    return now, {kernel_names[device]: values for device, values in diskstats.items() if device in kernel_names}
+
+
+async def get_lun_sampler(lun_names: list[str]) -> Sampler:
+    from performance_monitor.pool_and_lun.pool_and_lun import (
+        get_device_mapper_devices,
+        get_device_mapper_name,
+        get_iostat_from_diskstats,
+        get_pool_and_lun_data,
+        get_pools_with_luns,
+    )
+
+    pools = await get_pools_with_luns()
+    devices = await get_device_mapper_devices()
+    selected_pools: dict[str, list[str]] = {}
+    # kernel device name (dm-N) to the `<pool>-<lun>` name the LUN rows are built from
+    kernel_names: dict[str, str] = {}
+    for pool_name, luns in pools.items():
+        for lun_name in luns:
+            device = devices.get(get_device_mapper_name(pool_name, lun_name))
+            name = lun_name if pool_name != "RAPIDSTORE" else f"cache@{lun_name}"
+            if device is not None and name in lun_names:
+                selected_pools.setdefault(pool_name, []).append(lun_name)
+                kernel_names[device] = f"{pool_name}-{lun_name}"
+    if not kernel_names:
+        raise ValueError(f"none of {lun_names} is a known LUN")
+
+    previous_time, previous_diskstats = await read_diskstats(kernel_names)
+
+    async def sample() -> list[BasePerformanceModel]:
+        nonlocal previous_time, previous_diskstats
+        now, diskstats = await read_diskstats(kernel_names)
+        iostat_information = get_iostat_from_diskstats(
+            previous_diskstats, diskstats, (now - previous_time).total_seconds()
+        )
+        previous_time, previous_diskstats = now, diskstats
+        return [
+            lun for lun_data, _ in get_pool_and_lun_data(now, iostat_information, selected_pools) for lun in lun_data
+        ]
+
+    return sample
+
+
+async def get_fiber_channel_sampler(wwns: list[str]) -> Sampler:
+    from performance_monitor.ethernet_and_fiber_channel.ethernet_and_fiber_channel import (
+        get_fiber_channel_targets,
+        get_pm_data,
+        get_target_pm_data,
+    )
+
+    selected_wwns = [wwn for wwn in await get_fiber_channel_targets() if wwn in wwns]
+    if not selected_wwns:
+        raise ValueError(f"none of {wwns} is a known fibre channel target")
+
+    previous_raw_fc_data = {wwn: await get_target_pm_data(wwn) for wwn in selected_wwns}
+
+    async def sample() -> list[BasePerformanceModel]:
+        nonlocal previous_raw_fc_data
+        current_raw_fc_data = {wwn: await get_target_pm_data(wwn) for wwn in selected_wwns}
+        pm_data = await get_pm_data(current_raw_fc_data, previous_raw_fc_data, {}, {})
+        previous_raw_fc_data = current_raw_fc_data
+        return pm_data
+
+    return sample
+
+
+async def sample_periodically(sample: Sampler, interval_ms: int, duration: int) -> None:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    tick = 0
+    while loop.time() - started < duration:
+        tick += 1
+        # sleep until the next slot of the fixed grid so slow samples do not make the burst drift
+        await asyncio.sleep(max(started + tick * interval_ms / 1000 - loop.time(), 0))
+        try:
+            rows = await sample()
+        except Exception as e:
+            print(f"burst stopped: {e}")
+            return
+        for row in rows:
+            key = (row.__tablename__, row.name)
+            if key not in rings:
+                rings[key] = deque(maxlen=MAX_SAMPLES_PER_ENTITY)
+            rings[key].append(row)
+
+
+async def start_burst(
+    sampler_factory: Callable[[list[str]], Awaitable[Sampler]], names: list[str], interval_ms: int, duration: int
+) -> datetime:
+    global reserved_sessions
+    if reserved_sessions >= BURST_MAX_SESSIONS:
+        raise ValueError(f"already {reserved_sessions} bursts running, wait for one to finish")
+    reserved_sessions += 1
+    try:
+        sample = await sampler_factory(names)
+    except BaseException:
+        reserved_sessions -= 1
+        raise
+    task = asyncio.create_task(sample_periodically(sample, interval_ms, duration))
+    burst_tasks.add(task)
+    task.add_done_callback(release_session)
+    return datetime.now() + timedelta(seconds=duration)
+
+
+def release_session(task: asyncio.Task) -> None:
+    global reserved_sessions
+    burst_tasks.discard(task)
+    reserved_sessions -= 1
+
+
+async def stop_bursts() -> None:
+    for task in list(burst_tasks):
+        task.cancel()
+    await asyncio.gather(*burst_tasks, return_exceptions=True)
+
+
+def get_burst_data(name: str, model: Type[BasePerformanceModel]):
+    """
+    Return the burst samples of `name` in the same shape as `get_monitoring_data`.
+    """
+    field_names = (
+        "time",
+        *list(map(get_filed_name, model.get_fields_must_be_aggrigated_with_sum())),
+        *list(map(get_filed_name, model.get_fields_must_be_aggrigated_with_max())),
+    )
+    oldest = datetime.now() - timedelta(seconds=BURST_RETENTION_SECONDS)
+    samples = [
+        tuple(getattr(row, field_name) for field_name in field_names)
+        for row in rings.get((model.__tablename__, name), ())
+        if row.time >= oldest
+    ]
+    return refactore_result(name, field_names, samples)
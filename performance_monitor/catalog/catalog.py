@@ -0,0 +1,122 @@
+from collections.abc import Iterable
+from typing import Any, Type
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, func, select
+
+from performance_monitor.catalog.model import EntityCatalog
+from performance_monitor.common_repo import BasePerformanceModel
+from performance_monitor.config import ENTITY_ALIASES
+from performance_monitor.db import get_async_session
+from performance_monitor.ethernet_and_fiber_channel.model import Ethernet, FiberChannel
+from performance_monitor.pool_and_lun.model import LUNData, PoolData
+
+
+def get_aliases(source: str, name: str) -> str:
+    return ",".join(ENTITY_ALIASES.get(source, {}).get(name, ()))
+
+
+def update_catalog(session: Session, rows: Iterable[BasePerformanceModel]) -> None:
+    """
+    Record the entities of `rows` in the catalog, widening their first/last seen times.
+    """
+    upsert_catalog(
+        session,
+        [
+            {
+                "source": row.__tablename__,
+                "name": row.name,
+                "first_seen": row.time,
+                "last_seen": row.time,
+                "aliases": get_aliases(row.__tablename__, row.name),
+            }
+            for row in rows
+        ],
+    )
+
+
+def backfill_catalog(session: Session) -> None:
+    """
+    Record every entity that already has rows, for databases created before the catalog existed.
+    Each entity is a group on the (name, time) primary key, so this is one index scan per table.
+    """
+    for model in (Ethernet, FiberChannel, PoolData, LUNData):
+        entities = session.execute(select(model.name, func.min(model.time), func.max(model.time)).group_by(model.name))
+        upsert_catalog(
+            session,
+            [
+                {
+                    "source": model.__tablename__,
+                    "name": name,
+                    "first_seen": first_seen,
+                    "last_seen": last_seen,
+                    "aliases": get_aliases(model.__tablename__, name),
+                }
+                for name, first_seen, last_seen in entities
+            ],
+        )
+
+
+def upsert_catalog(session: Session, values: list[dict[str, Any]]) -> None:
+    if not values:
+        return
+    statement = insert(EntityCatalog)
+    statement = statement.on_conflict_do_update(
+        index_elements=[EntityCatalog.source, EntityCatalog.name],
+        set_={
+            # sqlite's multi-argument min/max are scalar functions, not aggregates
+            "first_seen": func.min(EntityCatalog.first_seen, statement.excluded.first_seen),
+            "last_seen": func.max(EntityCatalog.last_seen, statement.excluded.last_seen),
+            "aliases": statement.excluded.aliases,
+        },
+    )
+    session.execute(statement, values)
+
+
+def resync_catalog(session: Session, model: Type[BasePerformanceModel], condition: Any) -> None:
+    """
+    Recompute first/last seen of the catalog entries of `model` matching `condition` after rows were deleted,
+    and drop the entries that have no rows left. Each lookup is a min/max on the (name, time) primary key.
+    """
+    session.execute(
+        update(EntityCatalog)
+        .where(EntityCatalog.source == model.__tablename__, condition)
+        .values(
+            first_seen=select(func.min(model.time)).where(model.name == EntityCatalog.name).scalar_subquery(),
+            last_seen=select(func.max(model.time)).where(model.name == EntityCatalog.name).scalar_subquery(),
+        )
+    )
+    session.execute(
+        delete(EntityCatalog).where(
+            EntityCatalog.source == model.__tablename__,
+            EntityCatalog.first_seen.is_(None),  # type: ignore
+        )
+    )
+
+
+def remove_from_catalog(session: Session, model: Type[BasePerformanceModel], name: str) -> None:
+    session.execute(
+        delete(EntityCatalog).where(EntityCatalog.source == model.__tablename__, EntityCatalog.name == name)
+    )
+
+
+async def get_catalog(source: str | None) -> list[EntityCatalog]:
+    async with get_async_session() as session:
+        statement = select(EntityCatalog).order_by(EntityCatalog.source, EntityCatalog.name)
+        if source:
+            statement = statement.where(EntityCatalog.source == source)
+        result_ = await session.execute(statement)
+        return list(result_.scalars().all())
+
+
+def resolve_aliases(model: Type[BasePerformanceModel], names: list[str]) -> list[str]:
+    """
+    Replace every name that is an alias by the entity name it stands for.
+    """
+    aliases = {
+        alias: name
+        for name, entity_aliases in ENTITY_ALIASES.get(model.__tablename__, {}).items()
+        for alias in entity_aliases
+    }
+    return [aliases.get(name, name) for name in names]
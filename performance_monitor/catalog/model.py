@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class EntityCatalog(SQLModel, table=True):
+    source: str = Field(primary_key=True)
+    name: str = Field(primary_key=True)
+    first_seen: datetime | None = None
+    last_seen: datetime | None = None
+    # comma separated
+    aliases: str = ""
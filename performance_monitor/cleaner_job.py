@@ -1,17 +1,26 @@
 from datetime import datetime, timedelta
 from sqlalchemy import delete
+from performance_monitor.anomaly.model import AnomalyEvent
+from performance_monitor.catalog.catalog import resync_catalog
+from performance_monitor.catalog.model import EntityCatalog
 from performance_monitor.config import MAX_DAYS_TO_KEEP
 from performance_monitor.ethernet_and_fiber_channel.model import Ethernet, FiberChannel
 from performance_monitor.pool_and_lun.model import PoolData, LUNData
+from performance_monitor.snapshot.model import LatestValue
+from performance_monitor.snapshot.snapshot import resync_latest_values
 from performance_monitor.db import get_session
 
 
-async def clean_old_data():
+def clean_old_data():
     with get_session() as session:
         session.exec(delete(Ethernet).where(Ethernet.time < datetime.now() - timedelta(days=MAX_DAYS_TO_KEEP)))  # type: ignore
         session.exec(delete(FiberChannel).where(FiberChannel.time < datetime.now() - timedelta(days=MAX_DAYS_TO_KEEP)))  # type: ignore
         session.exec(delete(PoolData).where(PoolData.time < datetime.now() - timedelta(days=MAX_DAYS_TO_KEEP)))  # type: ignore
         session.exec(delete(LUNData).where(LUNData.time < datetime.now() - timedelta(days=MAX_DAYS_TO_KEEP)))  # type: ignore
+        session.exec(delete(AnomalyEvent).where(AnomalyEvent.time < datetime.now() - timedelta(days=MAX_DAYS_TO_KEEP)))  # type: ignore
+        session.exec(delete(LatestValue).where(LatestValue.time < datetime.now() - timedelta(days=MAX_DAYS_TO_KEEP)))  # type: ignore
+        for model in (Ethernet, FiberChannel, PoolData, LUNData):
+            resync_catalog(session, model, EntityCatalog.first_seen < datetime.now() - timedelta(days=MAX_DAYS_TO_KEEP))  # type: ignore
         session.commit()
 
 
@@ -21,4 +30,8 @@ def clean_forward_performance_monitor_data(time: datetime):
         session.exec(delete(FiberChannel).where(FiberChannel.time > time))  # type: ignore
         session.exec(delete(PoolData).where(PoolData.time > time))  # type: ignore
         session.exec(delete(LUNData).where(LUNData.time > time))  # type: ignore
+        session.exec(delete(AnomalyEvent).where(AnomalyEvent.time > time))  # type: ignore
+        for model in (Ethernet, FiberChannel, PoolData, LUNData):
+            resync_catalog(session, model, EntityCatalog.last_seen > time)  # type: ignore
+            resync_latest_values(session, model, LatestValue.time > time)  # type: ignore
         session.commit()
@@ -8,16 +8,18 @@ from performance_monitor.common_repo import ensure_system_requirements
 from performance_monitor.pool_and_lun.pool_and_lun import pool_and_lun_job
 from performance_monitor.ethernet_and_fiber_channel.ethernet_and_fiber_channel import fiber_channel_and_ethernet_job
 from performance_monitor.cleaner_job import clean_old_data
+from performance_monitor.supervisor import supervise
+from performance_monitor.writer import Sink
 
 
 def discontinuous_collector_task(interval: int = DEFAULT_WAITING_TIME):
     def decorator(func):
-        async def wrapper():
+        async def wrapper(*args):
             while True:
                 print(f"{func.__name__} started to collect data at {datetime.now()}")
                 now = time()
                 await asyncio.gather(
-                    func(),
+                    func(*args),
                     asyncio.sleep(interval),
                 )
                 print(f"{func.__name__} finished in {time() - now} seconds at {datetime.now()}")
@@ -27,33 +29,29 @@ def discontinuous_collector_task(interval: int = DEFAULT_WAITING_TIME):
     return decorator
 
 
-async def cleaner_job():
-    while True:
-        await asyncio.gather(
-            clean_old_data(),
-            asyncio.sleep(60 * 60),
-        )
-
-
 @discontinuous_collector_task()
-async def collector_pool_and_lun():
-    await pool_and_lun_job()
+async def collector_pool_and_lun(sink: Sink):
+    await pool_and_lun_job(sink)
 
 
-async def collector_fiber_channel_and_ethernet():
-    await fiber_channel_and_ethernet_job()
+async def collector_fiber_channel_and_ethernet(sink: Sink):
+    await fiber_channel_and_ethernet_job(sink)
 
 
-async def main():
+def main():
     # Check if required system commands are available before starting the collector
     ensure_system_requirements()
     init_db()
-    await asyncio.gather(
-        collector_pool_and_lun(),
-        collector_fiber_channel_and_ethernet(),
-        cleaner_job(),
+    # each collector family runs in its own process so a slow or crashing one cannot stall the others
+    supervise(
+        {
+            "collector_pool_and_lun": collector_pool_and_lun,
+            "collector_fiber_channel_and_ethernet": collector_fiber_channel_and_ethernet,
+        },
+        # the cleaner deletes rows, so it runs between the supervisor's writes to keep a single writer
+        {"cleaner_job": (clean_old_data, 60 * 60)},
     )
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
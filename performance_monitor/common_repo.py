@@ -1,16 +1,22 @@
 import asyncio
-import subprocess
+import heapq
+import shutil
 from datetime import datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
 from typing import Any, Sequence, Type, TypeVar
 
-from sqlalchemy import TextClause, literal_column, text
+from sqlalchemy import TextClause, literal_column, or_, text
 from sqlmodel import Field, SQLModel, func, select, desc
 
-from performance_monitor.config import MAX_POINT
+from performance_monitor.config import MAX_POINT, QUERY_MIN_CHUNK_HOURS, QUERY_PARALLELISM
 from performance_monitor.db import get_async_session
+from performance_monitor.snapshot.model import LatestValue
 
 T = TypeVar("T")
 
+# bounds the connections (and so the SQLite threads) one process uses for concurrent query chunks
+query_slots = asyncio.Semaphore(QUERY_PARALLELISM)
+
 
 class BasePerformanceModel(SQLModel):
     name: str = Field(primary_key=True)
@@ -26,6 +32,14 @@ class BasePerformanceModel(SQLModel):
     def get_conditions_for_total_values():
         return True
 
+    @staticmethod
+    def get_fields_must_be_checked_for_spike() -> tuple[Any, ...]:
+        return tuple()
+
+    @staticmethod
+    def get_fields_must_be_checked_for_collapse() -> tuple[Any, ...]:
+        return tuple()
+
 
 def refactore_result(name: str, filed_names: tuple[str, ...], results: Sequence[SQLModel]):
     transposed_data = list(zip(*results))
@@ -59,6 +73,34 @@ def get_time_interval_expr(generation) -> TextClause:
             raise Exception(f"invalide {generation=}")
 
 
+def to_local_time(moment: datetime) -> datetime:
+    """
+    Return `moment` as the naive local time rows are stored in, clients often send UTC (`...Z`) or an offset.
+    """
+    return moment.astimezone().replace(tzinfo=None) if moment.tzinfo else moment
+
+
+def get_bucket_start(generation: int, moment: datetime) -> datetime:
+    """
+    Return the start of the bucket that contains `moment`, mirroring `get_time_interval_expr`.
+    """
+    match generation:
+        case 5:
+            return datetime(moment.year, moment.month, moment.day) - timedelta(days=moment.day % 2)
+        case 4:
+            return moment.replace(minute=0, second=0, microsecond=0) - timedelta(hours=moment.hour % 4)
+        case 3:
+            return moment.replace(minute=0, second=0, microsecond=0)
+        case 2:
+            return moment.replace(second=0, microsecond=0) - timedelta(minutes=moment.minute % 5)
+        case 1:
+            return moment.replace(second=0, microsecond=0)
+        case 0:
+            return moment.replace(microsecond=0) - timedelta(seconds=moment.second % 5)
+        case _:
+            raise Exception(f"invalide {generation=}")
+
+
 def get_filed_name(model_filed) -> str:
     return str(model_filed).rsplit(".")[-1]
 
@@ -130,12 +172,8 @@ def ensure_system_requirements():
     missing_commands = []
 
     for command, package in required_commands.items():
-        try:
-            result = subprocess.run(["which", command], capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                missing_commands.append((command, package))
-        except Exception as e:
-            print(f"ERROR: Could not check for {command} availability: {e}")
+        # looked up on PATH in-process, spawning `which` for every command is a noticeable part of a cold start
+        if shutil.which(command) is None:
             missing_commands.append((command, package))
 
     if missing_commands:
@@ -149,10 +187,49 @@ def ensure_system_requirements():
         exit(1)
 
 
-async def get_monitoring_data(name: str, model: Type[BasePerformanceModel], generation: int, start, end):
+def get_name_condition(names: list[str], model: Type[BasePerformanceModel]):
+    """
+    Match the rows of `names`, where an empty name stands for the totals of `model`.
+    """
+    conditions = []
+    if "" in names:
+        conditions.append(model.get_conditions_for_total_values())
+    if named := [name for name in names if name]:
+        conditions.append(model.name.in_(named))  # type: ignore
+    return or_(*conditions)
+
+
+async def get_last_tick(names: list[str], model: Type[BasePerformanceModel]) -> datetime | None:
+    """
+    Return the time of the most recently ingested row for `names` (or for the totals when a name is empty).
+
+    Read from the last-value table (one row per entity) so unchanged polls never touch the performance tables.
+    Totals use the latest row of any entity of the model, every collection writes all of them in the same tick.
+    """
+    async with get_async_session() as session:
+        statement = select(func.max(LatestValue.time)).where(LatestValue.source == model.__tablename__)
+        if "" not in names:
+            statement = statement.where(LatestValue.name.in_(names))  # type: ignore
+        result_ = await session.execute(statement)
+        return result_.scalar()
+
+
+def get_aggregated_fields(model: Type[BasePerformanceModel]) -> tuple[Any, ...]:
+    return (*model.get_fields_must_be_aggrigated_with_sum(), *model.get_fields_must_be_aggrigated_with_max())
+
+
+def split_time_range(start: datetime, end: datetime) -> list[tuple[datetime, datetime]]:
+    chunk_count = min(QUERY_PARALLELISM, int((end - start) / timedelta(hours=QUERY_MIN_CHUNK_HOURS)))
+    if chunk_count <= 1:
+        return [(start, end)]
+    chunk = (end - start) / chunk_count
+    return [(start + chunk * index, start + chunk * (index + 1)) for index in range(chunk_count)]
+
+
+async def get_bucket_averages(name: str, model: Type[BasePerformanceModel], generation: int, start, end) -> list[Any]:
     time_interval_expr = get_time_interval_expr(generation)
     time_interval_clause = literal_column(f"({time_interval_expr})")
-    async with get_async_session() as session:
+    async with query_slots, get_async_session() as session:
         statement = (
             select(
                 time_interval_clause,
@@ -179,7 +256,108 @@ async def get_monitoring_data(name: str, model: Type[BasePerformanceModel], gene
             .limit(MAX_POINT)
         )
         result_ = await session.execute(statement)
-        result = result_.all()[::-1]
+        return result_.all()[::-1]
+
+
+async def get_bucket_partial_aggregates(
+    name: str, model: Type[BasePerformanceModel], generation: int, start, end, include_end: bool
+) -> list[Any]:
+    """
+    Return per bucket the sum and the count of every field, which unlike averages can be merged across chunks.
+    """
+    time_interval_expr = get_time_interval_expr(generation)
+    time_interval_clause = literal_column(f"({time_interval_expr})")
+    fields = get_aggregated_fields(model)
+    async with query_slots, get_async_session() as session:
+        statement = (
+            select(
+                time_interval_clause,
+                *[func.sum(field) for field in fields],
+                *[func.count(field) for field in fields],
+            )
+            .where(
+                model.name == name if name else model.get_conditions_for_total_values(),
+                model.time >= start,
+                model.time <= end if include_end else model.time < end,
+            )
+            .group_by(time_interval_clause)
+            .order_by(desc(time_interval_clause))
+            # a bucket outside the last MAX_POINT of its chunk is outside the last MAX_POINT overall
+            .limit(MAX_POINT)
+        )
+        result_ = await session.execute(statement)
+        return result_.all()
+
+
+def round_like_sqlite(value: float, digits: int = 2) -> float:
+    """
+    Round `value` like SQLite's round(): half away from zero on its 15 significant digits.
+
+    Python's round() works on the exact binary value and rounds exact halves to even, so 227.125 would give 227.12
+    where the single-query path returns 227.13.
+    """
+    return float(Decimal(f"{value:.15g}").quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+async def get_bucket_averages_in_parallel(
+    name: str, model: Type[BasePerformanceModel], generation: int, time_ranges: list[tuple[datetime, datetime]]
+) -> list[Any]:
+    """
+    Aggregate every time range on its own connection (each aiosqlite connection runs in its own thread)
+    and merge the partial sums and counts into per bucket averages.
+    """
+    partial_results = await asyncio.gather(
+        *(
+            get_bucket_partial_aggregates(name, model, generation, start, end, index == len(time_ranges) - 1)
+            for index, (start, end) in enumerate(time_ranges)
+        )
+    )
+    field_count = len(get_aggregated_fields(model))
+    merged: dict[str, list[float]] = {}
+    for partial_result in partial_results:
+        for bucket, *values in partial_result:
+            totals = merged.setdefault(bucket, [0] * (field_count * 2))
+            for index, value in enumerate(values):
+                totals[index] += value or 0
+
+    return [
+        (
+            bucket,
+            *(
+                round_like_sqlite(merged[bucket][index] / merged[bucket][field_count + index])
+                if merged[bucket][field_count + index]
+                else None
+                for index in range(field_count)
+            ),
+        )
+        for bucket in sorted(merged)[-MAX_POINT:]
+    ]
+
+
+async def get_monitoring_data(
+    name: str,
+    model: Type[BasePerformanceModel],
+    generation: int,
+    start,
+    end,
+    since: datetime | None = None,
+    time_series: list[Any] | None = None,
+):
+    """
+    Aggregate `model` rows per `generation` bucket between `start` and `end`.
+
+    When `since` is given only the buckets from the one containing `since` onwards are returned,
+    so a polling client receives the new buckets plus the still-open last one.
+    Wide ranges are split into chunks that are aggregated concurrently.
+    `time_series` lets callers querying many names share the bucket times used to pad missing buckets.
+    """
+    if since is not None:
+        start = max(start, get_bucket_start(generation, since))
+    time_ranges = split_time_range(start, end)
+    if len(time_ranges) > 1:
+        result = await get_bucket_averages_in_parallel(name, model, generation, time_ranges)
+    else:
+        result = await get_bucket_averages(name, model, generation, start, end)
 
     field_names = (
         "time",
@@ -191,13 +369,77 @@ async def get_monitoring_data(name: str, model: Type[BasePerformanceModel], gene
         generation,
         len(model.get_fields_must_be_aggrigated_with_sum()) + len(model.get_fields_must_be_aggrigated_with_max()),
         time_frame=(start, end),
+        time_series=time_series,
     )
     refactored_result = refactore_result(name, field_names, extended_result)
     return refactored_result
 
 
-async def extend_with_null(result, generation, length_of_fields, time_frame) -> list[Any]:
-    times = await get_time_series(generation, time_frame=time_frame)
+async def get_batch_monitoring_data(
+    names: list[str],
+    model: Type[BasePerformanceModel],
+    generation: int,
+    start,
+    end,
+    since: datetime | None = None,
+):
+    """
+    Run `get_monitoring_data` for every name concurrently, bounded by `QUERY_PARALLELISM` connections.
+    """
+    if since is not None:
+        start = max(start, get_bucket_start(generation, since))
+    time_series = await get_time_series(generation, time_frame=(start, end)) if len(names) > 1 else None
+    return await asyncio.gather(
+        *(get_monitoring_data(name, model, generation, start, end, time_series=time_series) for name in names)
+    )
+
+
+def get_aggregated_field(model: Type[BasePerformanceModel], metric: str):
+    for field in get_aggregated_fields(model):
+        if get_filed_name(field) == metric:
+            return field
+    return None
+
+
+async def get_top_entities(
+    model: Type[BasePerformanceModel],
+    metric: str,
+    aggregation: str,
+    count: int,
+    start: datetime,
+    end: datetime,
+) -> list[dict[str, Any]]:
+    """
+    Rank the entities of `model` by the `aggregation` ("avg" or "max") of `metric` between `start` and `end`.
+    All entities are aggregated in one grouped query and only the `count` largest are kept.
+    """
+    field = get_aggregated_field(model, metric)
+    if field is None:
+        raise ValueError(f"invalide {metric=} for {model.__name__}")
+    aggregate = func.max(field) if aggregation == "max" else func.avg(field)
+
+    async with get_async_session() as session:
+        statement = (
+            select(model.name, func.round(aggregate, 2))
+            .where(model.time >= start, model.time <= end)
+            .group_by(model.name)
+        )
+        result_ = await session.stream(statement)
+        # min-heap of the `count` largest values seen so far
+        top: list[tuple[float, str]] = []
+        async for name, value in result_:
+            if value is None:
+                continue
+            if len(top) < count:
+                heapq.heappush(top, (value, name))
+            elif value > top[0][0]:
+                heapq.heapreplace(top, (value, name))
+
+    return [{"name": name, "value": value} for value, name in sorted(top, reverse=True)]
+
+
+async def extend_with_null(result, generation, length_of_fields, time_frame, time_series=None) -> list[Any]:
+    times = time_series if time_series is not None else await get_time_series(generation, time_frame=time_frame)
     return [(sample, *((None,) * length_of_fields)) for sample in times[: -len(result)]] + result
 
 
@@ -206,7 +448,7 @@ async def get_time_series(generation, max_point=MAX_POINT, time_frame=(None, Non
     time_interval_clause = literal_column(f"({time_interval_expr})")
     from performance_monitor.ethernet_and_fiber_channel.model import Ethernet
 
-    async with get_async_session() as session:
+    async with query_slots, get_async_session() as session:
         statement = (
             select(time_interval_clause)
             .where(Ethernet.name == "eno1", (Ethernet.time >= time_frame[0]) & (Ethernet.time <= time_frame[1]))
@@ -1,3 +1,38 @@
+import os
+
 REAL_TIME_INTERVAL = 5
 MAX_POINT = 30_000
 MAX_DAYS_TO_KEEP = 30
+ANOMALY_EWMA_ALPHA = 0.1
+ANOMALY_Z_SCORE_THRESHOLD = 4.0
+ANOMALY_WARMUP_SAMPLES = 12
+ANOMALY_MIN_RELATIVE_DEVIATION = 0.1
+# smallest change worth flagging per metric (ms for latencies, MB/s for bandwidth, operations/s for iops),
+# idle series hover around 0 and would otherwise turn their first tiny I/O into a huge score
+ANOMALY_MIN_ABSOLUTE_DEVIATION = {
+    "read_latency": 1.0,
+    "write_latency": 1.0,
+    "latency": 1.0,
+    "bandwidth": 1.0,
+    "iops": 10.0,
+}
+BURST_MIN_INTERVAL_MS = 100
+BURST_MAX_INTERVAL_MS = 1_000
+BURST_MAX_DURATION = 300
+BURST_RETENTION_SECONDS = 60 * 60
+BURST_MAX_SESSIONS = 4
+GATEWAY_NODES = [
+    node.rstrip("/") for node in os.environ.get("PERFORMANCE_MONITOR_GATEWAY_NODES", "").split(",") if node
+]
+GATEWAY_NODE_TIMEOUT = 5
+GATEWAY_MAX_CONNECTIONS_PER_NODE = 10
+# aliases recorded in the entity catalog, per table and entity name
+ENTITY_ALIASES: dict[str, dict[str, tuple[str, ...]]] = {
+    "ethernet": {"eno1": ("Primary",), "eno2": ("Secondary",)},
+}
+SUPERVISOR_MIN_BACKOFF = 1
+SUPERVISOR_MAX_BACKOFF = 60
+SUPERVISOR_STABLE_AFTER = 60
+SUPERVISOR_QUEUE_SIZE = 1_000
+QUERY_PARALLELISM = min(os.cpu_count() or 1, 8)
+QUERY_MIN_CHUNK_HOURS = 6
@@ -1,3 +1,4 @@
+import zlib
 from contextlib import asynccontextmanager
 
 from sqlalchemy import text
@@ -19,10 +20,52 @@ async def get_async_session() -> AsyncSession:
 sync_engine = create_engine(SYNC_DATABASE_URL)
 
 
+def set_database_path(path: str) -> None:
+    """
+    Point both engines at another database file, for tools and tests working on a scratch database.
+
+    The engines resolve the relative default path when they are created, so changing directory afterwards is not enough.
+    """
+    global async_engine, sync_engine
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", echo=async_engine.echo)
+    sync_engine = create_engine(f"sqlite:///{path}")
+
+
+def get_schema_version() -> int:
+    """
+    Fingerprint of the tables, columns and indexes of the imported models, small enough for `PRAGMA user_version`.
+    """
+    schema = [
+        (
+            table.name,
+            [(column.name, str(column.type), column.nullable, column.primary_key) for column in table.columns],
+            sorted(index.name for index in table.indexes if index.name),
+        )
+        for table in SQLModel.metadata.sorted_tables
+    ]
+    return zlib.crc32(repr(schema).encode()) & 0x7FFFFFFF
+
+
 def init_db():
+    # imported here, the catalog and snapshot depend on the models which depend on this module;
+    # importing them registers every table, so callers importing only this module get the full schema
+    import performance_monitor.anomaly.model  # noqa: F401
+    from performance_monitor.catalog.catalog import backfill_catalog
+    from performance_monitor.snapshot.snapshot import backfill_latest_values
+
+    schema_version = get_schema_version()
     with sync_engine.connect() as conn:
+        # the journal mode is stored in the database file, so a database created for this schema is already in WAL
+        if conn.execute(text("PRAGMA user_version")).scalar() == schema_version:
+            return
         conn.execute(text("PRAGMA journal_mode=WAL"))
     SQLModel.metadata.create_all(sync_engine)
+    with Session(sync_engine) as session:
+        # tables added by an upgrade start empty, fill them from the rows that are already there
+        backfill_catalog(session)
+        backfill_latest_values(session)
+        session.exec(text(f"PRAGMA user_version = {schema_version}"))  # type: ignore
+        session.commit()
 
 
 def get_session() -> Session:
@@ -2,20 +2,19 @@ import asyncio
 from datetime import datetime
 from pathlib import Path
 from time import time
-from typing import NoReturn
-
-import aiofiles
-import psutil
-from psutil._common import snetio
+from typing import TYPE_CHECKING, NoReturn
 
 from performance_monitor.config import REAL_TIME_INTERVAL
-from performance_monitor.db import get_session
 from performance_monitor.ethernet_and_fiber_channel.model import (
     Ethernet,
     FiberChannel,
     RawEthernetData,
     RawFiberChannelData,
 )
+from performance_monitor.writer import Sink, write_rows
+
+if TYPE_CHECKING:
+    from psutil._common import snetio
 
 KILOBYTE_TO_MEGABYTE: int = 1_000
 BYTE_TO_MEGABYTE: int = 1_000_000
@@ -23,10 +22,16 @@ BYTE_TO_MEGABYTE: int = 1_000_000
 
 async def get_fiber_channel_targets() -> list[str]:
     fc_path = Path("/sys/kernel/scst_tgt/targets/qla2x00t/")
+    # hosts without the SCST FC target driver still have ethernet ports to collect
+    if not fc_path.is_dir():
+        return []
     return [fl.name for fl in fc_path.iterdir() if fl.is_dir()]
 
 
 async def read_file_content(file_path: Path) -> str:
+    # imported on first use so that importing this module (the API does through bursts) stays cheap
+    import aiofiles
+
     async with aiofiles.open(file_path, mode="r") as f:
         return (await f.read()).strip()
 
@@ -42,14 +47,14 @@ async def get_target_pm_data(wwn: str) -> RawFiberChannelData:
     )
 
 
-async def fiber_channel_and_ethernet_job() -> NoReturn:
+async def fiber_channel_and_ethernet_job(sink: Sink = write_rows) -> NoReturn:
     previous_raw_fiber_channel_data = await get_all_raw_fiber_channel_data()
     previous_raw_ethernet_data = await get_all_ethernet_data()
     while True:
         print(f"collector_fiber_channel_and_etherne started to collect data at {datetime.now()}")
         now = time()
         (previous_raw_fiber_channel_data, previous_raw_ethernet_data), _ = await asyncio.gather(
-            insert_pm_data_to_db(previous_raw_fiber_channel_data, previous_raw_ethernet_data),
+            insert_pm_data_to_db(previous_raw_fiber_channel_data, previous_raw_ethernet_data, sink),
             asyncio.sleep(REAL_TIME_INTERVAL),
         )
         print(f"collector_fiber_channel_and_etherne finished in {time() - now} seconds at {datetime.now()}")
@@ -58,26 +63,50 @@ async def fiber_channel_and_ethernet_job() -> NoReturn:
 async def insert_pm_data_to_db(
     previous_raw_fiber_channel_data: dict[str, RawFiberChannelData],
     previous_raw_ethernet_data: dict[str, RawEthernetData],
+    sink: Sink = write_rows,
 ) -> tuple[dict[str, RawFiberChannelData], dict[str, RawEthernetData]]:
     current_raw_fc_data = await get_all_raw_fiber_channel_data()
     current_raw_ethernet_data = await get_all_ethernet_data()
 
-    with get_session() as session:
-        for wwn, fc_data in current_raw_fc_data.items():
-            session.add(await get_fiber_channel(wwn, fc_data, previous_raw_fiber_channel_data[wwn]))
-        for port_name, ethernet_data in current_raw_ethernet_data.items():
-            session.add(await get_ethernet(port_name, ethernet_data, previous_raw_ethernet_data[port_name]))
-        session.commit()
+    pm_data = await get_pm_data(
+        current_raw_fc_data,
+        previous_raw_fiber_channel_data,
+        current_raw_ethernet_data,
+        previous_raw_ethernet_data,
+    )
+    sink(pm_data)
 
     return current_raw_fc_data, current_raw_ethernet_data
 
 
+async def get_pm_data(
+    current_raw_fc_data: dict[str, RawFiberChannelData],
+    previous_raw_fiber_channel_data: dict[str, RawFiberChannelData],
+    current_raw_ethernet_data: dict[str, RawEthernetData],
+    previous_raw_ethernet_data: dict[str, RawEthernetData],
+) -> list[FiberChannel | Ethernet]:
+    """
+    Turn two consecutive raw counter samples into rate rows.
+    Targets and ports without a previous sample (e.g. newly appeared ones) are skipped for this tick.
+    """
+    pm_data: list[FiberChannel | Ethernet] = []
+    for wwn, fc_data in current_raw_fc_data.items():
+        if wwn in previous_raw_fiber_channel_data:
+            pm_data.append(await get_fiber_channel(wwn, fc_data, previous_raw_fiber_channel_data[wwn]))
+    for port_name, ethernet_data in current_raw_ethernet_data.items():
+        if port_name in previous_raw_ethernet_data:
+            pm_data.append(await get_ethernet(port_name, ethernet_data, previous_raw_ethernet_data[port_name]))
+    return pm_data
+
+
 async def get_all_raw_fiber_channel_data() -> dict[str, RawFiberChannelData]:
     return {wwn: await get_target_pm_data(wwn) for wwn in await get_fiber_channel_targets()}
 
 
 async def get_all_ethernet_data() -> dict[str, RawEthernetData]:
-    interfaces: dict[str, snetio] = psutil.net_io_counters(pernic=True)
+    import psutil
+
+    interfaces: dict[str, "snetio"] = psutil.net_io_counters(pernic=True)
     now = datetime.now()
     return {
         port_name: RawEthernetData(
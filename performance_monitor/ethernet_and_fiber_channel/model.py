@@ -28,6 +28,10 @@ class FiberChannel(BasePerformanceModel, table=True):
     def get_fields_must_be_aggrigated_with_max():
         return tuple()
 
+    @staticmethod
+    def get_fields_must_be_checked_for_collapse():
+        return (FiberChannel.bandwidth, FiberChannel.iops)
+
 
 class Ethernet(BasePerformanceModel, table=True):
     bytes_sent: float
@@ -50,6 +54,10 @@ class Ethernet(BasePerformanceModel, table=True):
     def get_fields_must_be_aggrigated_with_max():
         return tuple()
 
+    @staticmethod
+    def get_fields_must_be_checked_for_collapse():
+        return (Ethernet.bandwidth,)
+
     @staticmethod
     def get_conditions_for_total_values():
         return Ethernet.name.like("enp7s0f%")  # type: ignore
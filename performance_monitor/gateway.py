@@ -0,0 +1,89 @@
+"""
+Federation gateway in front of several `monitor.app` instances (one per storage controller).
+
+Queries are sent to every node concurrently over pooled keep-alive connections and merged onto one time grid.
+Nodes that fail or do not answer within `GATEWAY_NODE_TIMEOUT` are left out and listed in the
+`X-Missing-Nodes` response header, so a slow controller only costs its timeout.
+
+usage:
+    PERFORMANCE_MONITOR_GATEWAY_NODES=http://ctrl-a:8000,http://ctrl-b:8000 uvicorn performance_monitor.gateway:app
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Literal
+
+import httpx
+from fastapi import FastAPI, Request, Response
+
+from performance_monitor.config import GATEWAY_MAX_CONNECTIONS_PER_NODE, GATEWAY_NODE_TIMEOUT, GATEWAY_NODES
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    limits = httpx.Limits(
+        max_connections=GATEWAY_MAX_CONNECTIONS_PER_NODE * max(len(GATEWAY_NODES), 1),
+        max_keepalive_connections=GATEWAY_MAX_CONNECTIONS_PER_NODE * max(len(GATEWAY_NODES), 1),
+    )
+    async with httpx.AsyncClient(limits=limits, timeout=GATEWAY_NODE_TIMEOUT) as client:
+        app.state.client = client
+        yield
+
+
+app = FastAPI(root_path="/performance", lifespan=lifespan)
+
+
+async def fetch_node(
+    client: httpx.AsyncClient, node: str, path: str, params: list[tuple[str, str]]
+) -> list[dict[str, Any]] | None:
+    try:
+        # the client's timeout only bounds each connect/read/write, a node trickling bytes would outlast it
+        async with asyncio.timeout(GATEWAY_NODE_TIMEOUT):
+            response = await client.get(f"{node}{path}", params=params)
+        response.raise_for_status()
+        return response.json()
+    except (httpx.HTTPError, ValueError, TimeoutError) as e:
+        print(f"gateway could not query {node}{path}: {e!r}")
+        return None
+
+
+def merge_on_time_grid(results: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """
+    Align the series of every node on the union of their bucket times, filling gaps with None.
+    """
+    series = [(node, result) for node, node_results in results.items() for result in node_results]
+    times = sorted({time for _, result in series for time in result["data"].get("time", ())})
+    positions = {time: position for position, time in enumerate(times)}
+
+    merged = []
+    for node, result in series:
+        data = result["data"]
+        aligned: dict[str, list] = {"time": times}
+        for field_name, values in data.items():
+            if field_name == "time":
+                continue
+            aligned_values: list = [None] * len(times)
+            for time, value in zip(data["time"], values):
+                if value is not None:
+                    aligned_values[positions[time]] = value
+            aligned[field_name] = aligned_values
+        merged.append({"name": result["name"], "node": node, "data": aligned})
+    return merged
+
+
+@app.get("/{model_path}")
+async def get_cluster_performance(
+    model_path: Literal["lun", "pool", "ethernet", "fibre-channel"],
+    request: Request,
+    response: Response,
+):
+    params = request.query_params.multi_items()
+    node_results = await asyncio.gather(
+        *(fetch_node(request.app.state.client, node, f"/{model_path}", params) for node in GATEWAY_NODES)
+    )
+
+    results = {node: result for node, result in zip(GATEWAY_NODES, node_results) if result is not None}
+    missing_nodes = [node for node, result in zip(GATEWAY_NODES, node_results) if result is None]
+    if missing_nodes:
+        response.headers["X-Missing-Nodes"] = ",".join(missing_nodes)
+    return merge_on_time_grid(results)
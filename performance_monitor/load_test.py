@@ -0,0 +1,350 @@
+"""
+HTTP load test of the query API.
+
+Seeds a scratch database with synthetic history, starts `monitor.app` in a server process, keeps a synthetic
+collector process writing one tick of every entity per interval and runs concurrent dashboard users issuing a mix of
+`/lun`, `/pool`, `/ethernet` and `/fibre-channel` requests across generations 0-5, with and without a name.
+The server, the writer and the load generator each get their own interpreter, as in production, so they do not
+compete for one GIL.
+
+Reported per endpoint and generation: throughput, p50/p99/p999 latency and the time spent inside SQLite
+(statement execution including any wait for the database lock). The collector's `write_rows` time (building the
+rows' values, anomaly detection, inserts, upserts and commit) is reported separately.
+
+usage:
+    python -m performance_monitor.load_test --users 32 --duration 60 --luns 200 --history-hours 24
+"""
+
+import argparse
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import random
+import subprocess
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timedelta
+from multiprocessing.connection import Connection
+from multiprocessing.synchronize import Event
+from time import perf_counter, sleep
+
+import httpx
+import uvicorn
+from sqlalchemy import event
+
+from performance_monitor import db, monitor
+from performance_monitor.common_repo import BasePerformanceModel
+from performance_monitor.config import REAL_TIME_INTERVAL
+from performance_monitor.ethernet_and_fiber_channel.model import Ethernet, FiberChannel
+from performance_monitor.pool_and_lun.model import LUNData, PoolData
+from performance_monitor.startup_benchmark import spawn, stop
+from performance_monitor.writer import write_rows
+
+ETHERNET_PORTS = ("eno1", "eno2", "enp7s0f0", "enp7s0f1")
+ENDPOINTS = {
+    "/lun": "lun_name",
+    "/pool": "pool_name",
+    "/ethernet": "network_name",
+    "/fibre-channel": "fiber_channel_name",
+}
+# dashboards mostly look at the recent generations
+GENERATION_WEIGHTS = (50, 20, 10, 10, 5, 5)
+NAMED_REQUEST_RATIO = 0.7
+SERVER_START_TIMEOUT = 60
+
+SERVER_SCRIPT = """
+import sys
+from performance_monitor import load_test
+load_test.run_server(int(sys.argv[1]), sys.argv[2])
+"""
+
+# the writer starts from a fresh interpreter, like the collector, instead of a fork of the load generator
+context = multiprocessing.get_context("spawn")
+
+db_time: contextvars.ContextVar[list[float] | None] = contextvars.ContextVar("db_time", default=None)
+
+
+def get_lun_name(index: int) -> str:
+    return f"lun{index}"
+
+
+def get_pool_name(index: int) -> str:
+    return f"pool{index}"
+
+
+def get_fiber_channel_name(index: int) -> str:
+    return f"21:00:00:24:ff:00:00:{index:02x}"
+
+
+def get_entity_names(args: argparse.Namespace) -> dict[str, list[str]]:
+    return {
+        "/lun": [get_lun_name(index) for index in range(args.luns)],
+        "/pool": [get_pool_name(index) for index in range(args.pools)],
+        "/ethernet": ["Primary", "Secondary", "enp7s0f0", "enp7s0f1"],
+        "/fibre-channel": [get_fiber_channel_name(index) for index in range(args.fiber_channels)],
+    }
+
+
+def get_tick(time: datetime, args: argparse.Namespace) -> list[BasePerformanceModel]:
+    rows: list[BasePerformanceModel] = []
+    for index in range(args.luns):
+        iops = random.uniform(0, 5_000)
+        latency = random.uniform(0.1, 10)
+        rows.append(
+            LUNData(
+                name=get_lun_name(index),
+                time=time,
+                read_iops=iops / 2,
+                write_iops=iops / 2,
+                read_bandwidth=iops / 200,
+                write_bandwidth=iops / 200,
+                read_latency=latency,
+                write_latency=latency,
+                iops=iops,
+                bandwidth=iops / 100,
+                latency=latency,
+            )
+        )
+    for index in range(args.pools):
+        iops = random.uniform(0, 50_000)
+        latency = random.uniform(0.1, 10)
+        rows.append(
+            PoolData(
+                name=get_pool_name(index),
+                time=time,
+                read_iops=iops / 2,
+                write_iops=iops / 2,
+                read_bandwidth=iops / 200,
+                write_bandwidth=iops / 200,
+                read_latency=latency,
+                write_latency=latency,
+                iops=iops,
+                bandwidth=iops / 100,
+                latency=latency,
+            )
+        )
+    for index in range(args.fiber_channels):
+        iops = random.uniform(0, 20_000)
+        rows.append(
+            FiberChannel(
+                name=get_fiber_channel_name(index),
+                time=time,
+                read_bandwidth=iops / 200,
+                write_bandwidth=iops / 200,
+                bandwidth=iops / 100,
+                read_iops=iops / 2,
+                write_iops=iops / 2,
+                iops=iops,
+            )
+        )
+    for port_name in ETHERNET_PORTS:
+        bandwidth = random.uniform(0, 1_000)
+        rows.append(
+            Ethernet(
+                name=port_name,
+                time=time,
+                bytes_sent=bandwidth / 2,
+                bytes_recv=bandwidth / 2,
+                bandwidth=bandwidth,
+                packets_sent=int(bandwidth * 100),
+                packets_recv=int(bandwidth * 100),
+            )
+        )
+    return rows
+
+
+def seed_history(args: argparse.Namespace) -> None:
+    now = datetime.now()
+    ticks = int(args.history_hours * 60 * 60 / REAL_TIME_INTERVAL)
+    rows: list[BasePerformanceModel] = []
+    for tick in range(ticks, 0, -1):
+        rows.extend(get_tick(now - timedelta(seconds=tick * REAL_TIME_INTERVAL), args))
+        if len(rows) >= 10_000:
+            write_rows(rows)
+            rows = []
+    if rows:
+        write_rows(rows)
+
+
+def synthetic_collector(args: argparse.Namespace, database_path: str, stopping: Event, results: Connection) -> None:
+    """
+    Write one tick of every entity per interval and send the time of every `write_rows` back once stopped.
+    """
+    db.set_database_path(database_path)
+    write_times: list[float] = []
+    while not stopping.is_set():
+        rows = get_tick(datetime.now(), args)
+        started = perf_counter()
+        write_rows(rows)
+        write_times.append(perf_counter() - started)
+        stopping.wait(args.tick)
+    results.send(write_times)
+
+
+def instrument_app() -> None:
+    """
+    Sum the SQLite statement time of every request and return it in the `X-DB-Time` header.
+    """
+
+    @event.listens_for(db.async_engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(perf_counter())
+
+    @event.listens_for(db.async_engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - conn.info["query_started"].pop()
+        if (request_db_time := db_time.get()) is not None:
+            request_db_time[0] += elapsed
+
+    @monitor.app.middleware("http")
+    async def measure_db_time(request, call_next):
+        request_db_time = [0.0]
+        db_time.set(request_db_time)
+        response = await call_next(request)
+        response.headers["X-DB-Time"] = str(request_db_time[0])
+        return response
+
+
+def run_server(port: int, database_path: str) -> None:
+    """
+    Entry point of the server process: serve the instrumented `monitor.app` on the scratch database.
+    """
+    db.set_database_path(database_path)
+    db.async_engine.echo = False
+    instrument_app()
+    # the load test runs where iostat/lvs may be missing, so the API is started without the system check
+    monitor.ensure_system_requirements = lambda: None
+    uvicorn.run(monitor.app, port=port, log_level="warning")
+
+
+def wait_for_server(server: subprocess.Popen, port: int) -> None:
+    started = perf_counter()
+    while perf_counter() - started < SERVER_START_TIMEOUT:
+        if server.poll() is not None:
+            raise Exception(f"the API exited with code {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/snapshot").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        sleep(0.05)
+    raise Exception(f"the API did not answer within {SERVER_START_TIMEOUT} seconds")
+
+
+async def user(
+    client: httpx.AsyncClient,
+    names: dict[str, list[str]],
+    deadline: float,
+    samples: dict[tuple[str, int], list[tuple[float, float]]],
+    errors: dict[tuple[str, int], int],
+) -> None:
+    while perf_counter() < deadline:
+        path = random.choice(list(ENDPOINTS))
+        generation = random.choices(range(len(GENERATION_WEIGHTS)), weights=GENERATION_WEIGHTS)[0]
+        params = {"generation": str(generation)}
+        if random.random() < NAMED_REQUEST_RATIO:
+            params[ENDPOINTS[path]] = random.choice(names[path])
+
+        started = perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors[(path, generation)] += 1
+            continue
+        samples[(path, generation)].append((perf_counter() - started, float(response.headers.get("X-DB-Time", 0))))
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+def print_report(
+    samples: dict[tuple[str, int], list[tuple[float, float]]],
+    errors: dict[tuple[str, int], int],
+    write_times: list[float],
+    duration: float,
+) -> None:
+    print(
+        f"{'endpoint':<16}{'gen':>4}{'req':>8}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'p999 ms':>10}"
+        f"{'db p50 ms':>11}{'db p99 ms':>11}{'errors':>8}"
+    )
+    for path, generation in sorted(set(samples) | set(errors)):
+        latencies = [latency for latency, _ in samples[(path, generation)]]
+        db_times = [db for _, db in samples[(path, generation)]]
+        print(
+            f"{path:<16}{generation:>4}{len(latencies):>8}{len(latencies) / duration:>9.1f}"
+            f"{percentile(latencies, 0.5) * 1000:>10.1f}{percentile(latencies, 0.99) * 1000:>10.1f}"
+            f"{percentile(latencies, 0.999) * 1000:>10.1f}"
+            f"{percentile(db_times, 0.5) * 1000:>11.1f}{percentile(db_times, 0.99) * 1000:>11.1f}"
+            f"{errors[(path, generation)]:>8}"
+        )
+    total = sum(len(values) for values in samples.values())
+    print(f"\ntotal {total} requests, {total / duration:.1f} req/s")
+    print(
+        f"collector write_rows: {len(write_times)}, p50 {percentile(write_times, 0.5) * 1000:.1f} ms, "
+        f"p99 {percentile(write_times, 0.99) * 1000:.1f} ms, max {max(write_times, default=0) * 1000:.1f} ms"
+    )
+
+
+async def run_users(
+    args: argparse.Namespace,
+) -> tuple[dict[tuple[str, int], list[tuple[float, float]]], dict[tuple[str, int], int], float]:
+    samples: dict[tuple[str, int], list[tuple[float, float]]] = defaultdict(list)
+    errors: dict[tuple[str, int], int] = defaultdict(int)
+    names = get_entity_names(args)
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    started = perf_counter()
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60) as client:
+        await asyncio.gather(
+            *(user(client, names, started + args.duration, samples, errors) for _ in range(args.users))
+        )
+    return samples, errors, perf_counter() - started
+
+
+async def main(args: argparse.Namespace) -> None:
+    db.async_engine.sync_engine.echo = False
+    db.init_db()
+    print(f"seeding {args.history_hours} hours of history into {os.getcwd()}")
+    seed_history(args)
+
+    database_path = os.path.abspath("monitoring.db")
+    server = spawn(SERVER_SCRIPT, str(args.port), database_path)
+    stopping = context.Event()
+    results, collector_results = context.Pipe(duplex=False)
+    collector = context.Process(target=synthetic_collector, args=(args, database_path, stopping, collector_results))
+    try:
+        wait_for_server(server, args.port)
+        collector.start()
+        samples, errors, duration = await run_users(args)
+    finally:
+        stopping.set()
+        stop(server)
+    # the writer sends its times once it has finished its current tick
+    write_times = results.recv() if collector.is_alive() and results.poll(args.tick + SERVER_START_TIMEOUT) else []
+    collector.join()
+    print_report(samples, errors, write_times, duration)
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load test the query API against a synthetic database")
+    parser.add_argument("--users", type=int, default=16, help="concurrent dashboard users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--luns", type=int, default=50)
+    parser.add_argument("--pools", type=int, default=4)
+    parser.add_argument("--fiber-channels", type=int, default=4)
+    parser.add_argument("--history-hours", type=float, default=6, help="synthetic history seeded before the test")
+    parser.add_argument("--tick", type=float, default=REAL_TIME_INTERVAL, help="synthetic collector interval")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workdir", help="directory for the scratch monitoring.db, a temporary one by default")
+    return parser
+
+
+if __name__ == "__main__":
+    arguments = get_parser().parse_args()
+    os.chdir(arguments.workdir or tempfile.mkdtemp(prefix="performance-monitor-load-test-"))
+    # the engines were bound to ./monitoring.db of the starting directory on import, keep the real database untouched
+    db.set_database_path(os.path.abspath("monitoring.db"))
+    asyncio.run(main(arguments))
@@ -1,17 +1,35 @@
+from collections.abc import Awaitable, Callable
 from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Annotated
+from hashlib import sha1
+from typing import Annotated, Literal, Type
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 
+from performance_monitor.anomaly.anomaly import get_anomaly_events
+from performance_monitor.burst import (
+    Sampler,
+    get_burst_data,
+    get_fiber_channel_sampler,
+    get_lun_sampler,
+    start_burst,
+    stop_bursts,
+)
+from performance_monitor.catalog.catalog import get_catalog, resolve_aliases
 from performance_monitor.common_repo import (
+    BasePerformanceModel,
     get_default_start_time_based_on_generation,
-    get_monitoring_data,
+    get_batch_monitoring_data,
+    get_last_tick,
+    get_top_entities,
     ensure_system_requirements,
+    to_local_time,
 )
+from performance_monitor.config import BURST_MAX_DURATION, BURST_MAX_INTERVAL_MS, BURST_MIN_INTERVAL_MS
 from performance_monitor.db import init_db
 from performance_monitor.ethernet_and_fiber_channel.model import Ethernet, FiberChannel
 from performance_monitor.pool_and_lun.model import LUNData, PoolData
+from performance_monitor.snapshot.snapshot import get_snapshot
 
 
 @asynccontextmanager
@@ -20,92 +38,253 @@ async def lifespan(app: FastAPI):
     ensure_system_requirements()
     init_db()
     yield
+    await stop_bursts()
 
 
 app = FastAPI(root_path="/performance", lifespan=lifespan)
 
+SOURCES: dict[str, Type[BasePerformanceModel]] = {
+    "fibre-channel": FiberChannel,
+    "lun": LUNData,
+    "pool": PoolData,
+    "ethernet": Ethernet,
+}
+
+
+def get_etag(names: list[str], model: Type[BasePerformanceModel], generation: int, last_tick: datetime | None) -> str:
+    tick = last_tick.isoformat() if last_tick else "empty"
+    # names may be long batches or hold characters a header can't carry (non latin-1, quotes), so use their digest
+    names_key = sha1(",".join(names).encode()).hexdigest()
+    return f'W/"{model.__tablename__}:{names_key}:{generation}:{tick}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+async def get_performance_response(
+    request: Request,
+    response: Response,
+    names: list[str] | None,
+    model: Type[BasePerformanceModel],
+    generation: int,
+    start: datetime | None,
+    end: datetime,
+    since: datetime | None,
+):
+    # no name means the totals
+    names = names or [""]
+    # the etag only changes when a new tick is ingested, so unchanged polls are answered without aggregating
+    etag = get_etag(names, model, generation, await get_last_tick(names, model))
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    start = to_local_time(start) if start else get_default_start_time_based_on_generation(generation)
+    results = await get_batch_monitoring_data(
+        names,
+        model,
+        generation,
+        start,
+        to_local_time(end),
+        since=to_local_time(since) if since else None,
+    )
+
+    response.headers["ETag"] = etag
+    return results
+
+
+async def get_top_response(
+    model: Type[BasePerformanceModel],
+    metric: str,
+    aggregation: str,
+    count: int,
+    start: datetime | None,
+    end: datetime,
+):
+    start = to_local_time(start) if start else get_default_start_time_based_on_generation(0)
+    try:
+        return await get_top_entities(model, metric, aggregation, count, start, to_local_time(end))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
 
 @app.get("/fibre-channel")
 async def get_fc_performance(
     *,
-    fiber_channel_name: Annotated[str, Query()] = "",
+    request: Request,
+    response: Response,
+    fiber_channel_name: Annotated[list[str] | None, Query()] = None,
     start: datetime | None = None,
     end: Annotated[datetime | None, Query(default_factory=lambda: datetime.now())],
     generation: Annotated[int, Query(ge=0, le=5)] = 0,
+    since: datetime | None = None,
 ):
-    if not start:
-        start = get_default_start_time_based_on_generation(generation)
-    results = await get_monitoring_data(
-        fiber_channel_name,
-        FiberChannel,
-        generation,
-        start,
-        end,
+    return await get_performance_response(
+        request, response, fiber_channel_name, FiberChannel, generation, start, end, since
     )
 
-    return [results]
-
 
 @app.get("/lun")
 async def get_lun_performance(
     *,
-    lun_name: Annotated[str, Query()] = "",
+    request: Request,
+    response: Response,
+    lun_name: Annotated[list[str] | None, Query()] = None,
     start: datetime | None = None,
     end: Annotated[datetime | None, Query(default_factory=lambda: datetime.now())],
     generation: Annotated[int, Query(ge=0, le=5)] = 0,
+    since: datetime | None = None,
 ):
-    if not start:
-        start = get_default_start_time_based_on_generation(generation)
-    results = await get_monitoring_data(
-        lun_name,
-        LUNData,
-        generation,
-        start,
-        end,
-    )
-
-    return [results]
+    return await get_performance_response(request, response, lun_name, LUNData, generation, start, end, since)
 
 
 @app.get("/pool")
 async def get_pool_performance(
     *,
-    pool_name: Annotated[str, Query()] = "",
+    request: Request,
+    response: Response,
+    pool_name: Annotated[list[str] | None, Query()] = None,
     start: datetime | None = None,
     end: Annotated[datetime | None, Query(default_factory=lambda: datetime.now())],
     generation: Annotated[int, Query(ge=0, le=5)] = 0,
+    since: datetime | None = None,
 ):
-    if not start:
-        start = get_default_start_time_based_on_generation(generation)
-    results = await get_monitoring_data(
-        pool_name,
-        PoolData,
-        generation,
-        start,
-        end,
-    )
-
-    return [results]
+    return await get_performance_response(request, response, pool_name, PoolData, generation, start, end, since)
 
 
 @app.get("/ethernet")
 async def get_ethernet_performance(
     *,
-    network_name: Annotated[str, Query(pattern="^(Primary|Secondary|enp7s0f\\d)$")] = "",
+    request: Request,
+    response: Response,
+    network_name: Annotated[list[str] | None, Query()] = None,
     start: datetime | None = None,
     end: Annotated[datetime | None, Query(default_factory=lambda: datetime.now())],
     generation: Annotated[int, Query(ge=0, le=5)] = 0,
+    since: datetime | None = None,
 ):
-    if not start:
-        start = get_default_start_time_based_on_generation(generation)
-    network_name = "eno1" if network_name == "Primary" else "eno2" if network_name == "Secondary" else network_name
+    network_name = resolve_aliases(Ethernet, network_name or [""])
 
-    results = await get_monitoring_data(
-        network_name,
-        Ethernet,
-        generation,
-        start,
-        end,
+    return await get_performance_response(request, response, network_name, Ethernet, generation, start, end, since)
+
+
+@app.get("/fibre-channel/top")
+async def get_fc_top(
+    *,
+    metric: str = "bandwidth",
+    aggregation: Literal["avg", "max"] = "avg",
+    count: Annotated[int, Query(ge=1, le=1000)] = 10,
+    start: datetime | None = None,
+    end: Annotated[datetime | None, Query(default_factory=lambda: datetime.now())],
+):
+    return await get_top_response(FiberChannel, metric, aggregation, count, start, end)
+
+
+@app.get("/lun/top")
+async def get_lun_top(
+    *,
+    metric: str = "bandwidth",
+    aggregation: Literal["avg", "max"] = "avg",
+    count: Annotated[int, Query(ge=1, le=1000)] = 10,
+    start: datetime | None = None,
+    end: Annotated[datetime | None, Query(default_factory=lambda: datetime.now())],
+):
+    return await get_top_response(LUNData, metric, aggregation, count, start, end)
+
+
+@app.get("/pool/top")
+async def get_pool_top(
+    *,
+    metric: str = "bandwidth",
+    aggregation: Literal["avg", "max"] = "avg",
+    count: Annotated[int, Query(ge=1, le=1000)] = 10,
+    start: datetime | None = None,
+    end: Annotated[datetime | None, Query(default_factory=lambda: datetime.now())],
+):
+    return await get_top_response(PoolData, metric, aggregation, count, start, end)
+
+
+@app.get("/ethernet/top")
+async def get_ethernet_top(
+    *,
+    metric: str = "bandwidth",
+    aggregation: Literal["avg", "max"] = "avg",
+    count: Annotated[int, Query(ge=1, le=1000)] = 10,
+    start: datetime | None = None,
+    end: Annotated[datetime | None, Query(default_factory=lambda: datetime.now())],
+):
+    return await get_top_response(Ethernet, metric, aggregation, count, start, end)
+
+
+@app.get("/events")
+async def get_events(
+    *,
+    source: Literal["fibre-channel", "lun", "pool", "ethernet"] | None = None,
+    name: Annotated[str, Query()] = "",
+    start: datetime | None = None,
+    end: Annotated[datetime | None, Query(default_factory=lambda: datetime.now())],
+    limit: Annotated[int, Query(ge=1, le=10_000)] = 1_000,
+):
+    return await get_anomaly_events(
+        SOURCES[source].__tablename__ if source else None,
+        name,
+        to_local_time(start) if start else get_default_start_time_based_on_generation(0),
+        to_local_time(end),
+        limit,
     )
 
-    return [results]
+
+async def get_burst_start_response(
+    sampler_factory: Callable[[list[str]], Awaitable[Sampler]], names: list[str], interval_ms: int, duration: int
+):
+    try:
+        until = await start_burst(sampler_factory, names, interval_ms, duration)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    except Exception as e:
+        # lvs or the sysfs counters the sampler is built from are unavailable
+        raise HTTPException(status_code=503, detail=f"could not start the burst: {e}") from e
+    return {"until": until}
+
+
+@app.post("/burst/lun")
+async def start_lun_burst(
+    *,
+    lun_name: Annotated[list[str], Query()],
+    interval_ms: Annotated[int, Query(ge=BURST_MIN_INTERVAL_MS, le=BURST_MAX_INTERVAL_MS)] = BURST_MIN_INTERVAL_MS,
+    duration: Annotated[int, Query(ge=1, le=BURST_MAX_DURATION)] = 60,
+):
+    return await get_burst_start_response(get_lun_sampler, lun_name, interval_ms, duration)
+
+
+@app.get("/burst/lun")
+async def get_lun_burst(*, lun_name: Annotated[str, Query()]):
+    return [get_burst_data(lun_name, LUNData)]
+
+
+@app.post("/burst/fibre-channel")
+async def start_fc_burst(
+    *,
+    fiber_channel_name: Annotated[list[str], Query()],
+    interval_ms: Annotated[int, Query(ge=BURST_MIN_INTERVAL_MS, le=BURST_MAX_INTERVAL_MS)] = BURST_MIN_INTERVAL_MS,
+    duration: Annotated[int, Query(ge=1, le=BURST_MAX_DURATION)] = 60,
+):
+    return await get_burst_start_response(get_fiber_channel_sampler, fiber_channel_name, interval_ms, duration)
+
+
+@app.get("/burst/fibre-channel")
+async def get_fc_burst(*, fiber_channel_name: Annotated[str, Query()]):
+    return [get_burst_data(fiber_channel_name, FiberChannel)]
+
+
+@app.get("/snapshot")
+async def get_latest_values():
+    return await get_snapshot({model.__tablename__: api_name for api_name, model in SOURCES.items()})
+
+
+@app.get("/catalog")
+async def get_entity_catalog(*, source: Literal["fibre-channel", "lun", "pool", "ethernet"] | None = None):
+    return await get_catalog(SOURCES[source].__tablename__ if source else None)
@@ -33,6 +33,14 @@ class LUNData(BasePerformanceModel, table=True):
     def get_fields_must_be_aggrigated_with_max():
         return tuple()
 
+    @staticmethod
+    def get_fields_must_be_checked_for_spike():
+        return (LUNData.read_latency, LUNData.write_latency, LUNData.latency)
+
+    @staticmethod
+    def get_fields_must_be_checked_for_collapse():
+        return (LUNData.bandwidth,)
+
 
 class PoolData(BasePerformanceModel, table=True):
     read_iops: float
@@ -92,3 +100,11 @@ class PoolData(BasePerformanceModel, table=True):
     @staticmethod
     def get_fields_must_be_aggrigated_with_max():
         return tuple()
+
+    @staticmethod
+    def get_fields_must_be_checked_for_spike():
+        return (PoolData.read_latency, PoolData.write_latency, PoolData.latency)
+
+    @staticmethod
+    def get_fields_must_be_checked_for_collapse():
+        return (PoolData.bandwidth,)
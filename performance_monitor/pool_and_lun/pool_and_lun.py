@@ -2,15 +2,22 @@ import asyncio
 import json
 import re
 from datetime import datetime
+from pathlib import Path
 from statistics import mean
 from sqlmodel import delete
 from sqlalchemy.exc import NoResultFound
 
+from performance_monitor.catalog.catalog import remove_from_catalog
 from performance_monitor.db import get_session
+from performance_monitor.ethernet_and_fiber_channel.ethernet_and_fiber_channel import read_file_content
 from performance_monitor.pool_and_lun.model import LUNData, PoolData
-from performance_monitor.common_repo import command_run
+from performance_monitor.snapshot.model import LatestValue
+from performance_monitor.common_repo import BasePerformanceModel, command_run
+from performance_monitor.writer import Sink, write_rows
 
 KILOBYTE_TO_MEGABYTE = 1000
+SECTOR_SIZE_IN_KILOBYTE = 0.5
+IOSTAT_TIMESTAMP_PATTERN = r"\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2} [APM]{2}"
 
 
 async def parse_iostat() -> tuple[datetime, dict[str, dict]]:
@@ -23,22 +30,24 @@ async def parse_iostat() -> tuple[datetime, dict[str, dict]]:
             ) from e
         raise e
 
+    return parse_iostat_output(output)
+
+
+def parse_iostat_output(output: str) -> tuple[datetime, dict[str, dict]]:
     lines = output.split("\n")
 
     device_data: dict[str, dict] = {}
     header = None
     timestamp = datetime.now()
 
-    for line in lines:
-        if timestamp_match := re.search(  # this is regex which matches the timestamp
-            r"\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2} [APM]{2}", line
-        ):
+    for index, line in enumerate(lines):
+        if timestamp_match := re.search(IOSTAT_TIMESTAMP_PATTERN, line):
             timestamp = datetime.strptime(timestamp_match.group(), "%m/%d/%Y %I:%M:%S %p")
 
         # Parse device statistics
         elif line.startswith("Device:"):
             header = line.split()
-            for device_line in lines[lines.index(line) + 1 :]:
+            for device_line in lines[index + 1 :]:
                 if device_line.strip() == "":
                     break
                 # values = device_line.split()
@@ -50,6 +59,51 @@ async def parse_iostat() -> tuple[datetime, dict[str, dict]]:
     return timestamp, device_data
 
 
+def parse_diskstats(lines: list[str]) -> dict[str, list[int]]:
+    return {name: list(map(int, values)) for _, _, name, *values in (line.split() for line in lines)}
+
+
+def get_iostat_from_diskstats(
+    previous: dict[str, list[int]], current: dict[str, list[int]], diff: float
+) -> dict[str, dict]:
+    """
+    Compute the `iostat -x` columns the LUN collector uses from two `/proc/diskstats` snapshots.
+    """
+    device_data: dict[str, dict] = {}
+    for device_name, values in current.items():
+        if device_name not in previous:
+            continue
+        reads, _, read_sectors, read_ms, writes, _, write_sectors, write_ms = (
+            value - previous_value for value, previous_value in zip(values[:8], previous[device_name][:8])
+        )
+        device_data[device_name] = {
+            "r/s": reads / diff,
+            "w/s": writes / diff,
+            "rkB/s": read_sectors * SECTOR_SIZE_IN_KILOBYTE / diff,
+            "wkB/s": write_sectors * SECTOR_SIZE_IN_KILOBYTE / diff,
+            "r_await": read_ms / reads if reads else 0.0,
+            "w_await": write_ms / writes if writes else 0.0,
+        }
+    return device_data
+
+
+async def get_device_mapper_devices() -> dict[str, str]:
+    """
+    Returns:
+    dict of device mapper names (as `iostat -N` reports them) to their kernel device names (dm-N)
+    """
+    return {
+        await read_file_content(device / "dm" / "name"): device.name
+        for device in Path("/sys/block").glob("dm-*")
+        if (device / "dm" / "name").exists()
+    }
+
+
+def get_device_mapper_name(pool_name: str, lun_name: str) -> str:
+    # device mapper escapes dashes inside volume group and logical volume names by doubling them
+    return f"{pool_name.replace('-', '--')}-{lun_name.replace('-', '--')}"
+
+
 async def get_pools_with_luns() -> dict[str, list[str]]:
     """
     Returns:
@@ -57,12 +111,17 @@ async def get_pools_with_luns() -> dict[str, list[str]]:
     """
 
     try:
-        lvs: list[dict[str, str]] = json.loads(await command_run("lvs --reportformat json"))["report"][0]["lv"]
+        output = await command_run("lvs --reportformat json")
     except Exception as e:
         if "No such file or directory" in str(e) or "command not found" in str(e):
             raise Exception("lvs command not found. Please install lvm2 package:\n  sudo apt install lvm2") from e
         raise e
 
+    return parse_lvs_output(output)
+
+
+def parse_lvs_output(output: str) -> dict[str, list[str]]:
+    lvs: list[dict[str, str]] = json.loads(output)["report"][0]["lv"]
     pools: dict[str, list[str]] = {}
     for lv in lvs:
         if not lv["lv_attr"].startswith("t"):
@@ -78,7 +137,48 @@ async def remove_replication_pool(pools: dict[str, list[str]]):
     pools.pop("REPLICATIONMETA", None)
 
 
-async def pool_and_lun_job():
+def get_pool_and_lun_data(
+    timestamp: datetime,
+    iostat_information: dict[str, dict],
+    pools: dict[str, list[str]],
+) -> list[tuple[list[LUNData], PoolData]]:
+    """
+    Build the LUN rows of every pool and the pool row aggregated from them for one iostat sample.
+    """
+    pool_and_lun_data: list[tuple[list[LUNData], PoolData]] = []
+    for pool_name in pools:
+        lun_data: list[LUNData] = []
+        for lun_name in pools[pool_name]:
+            # ignore snapshot lun
+            if lun_name.endswith("_snp"):
+                continue
+
+            new_lun_data = iostat_information.get(f"{pool_name}-{lun_name}")
+            if new_lun_data is None:
+                continue
+            raw_lun = LUNData(
+                name=lun_name if pool_name != "RAPIDSTORE" else f"cache@{lun_name}",
+                time=timestamp,
+                read_iops=new_lun_data["r/s"],
+                write_iops=new_lun_data["w/s"],
+                read_bandwidth=new_lun_data["rkB/s"] / KILOBYTE_TO_MEGABYTE,
+                write_bandwidth=new_lun_data["wkB/s"] / KILOBYTE_TO_MEGABYTE,
+                read_latency=new_lun_data["r_await"],
+                write_latency=new_lun_data["w_await"],
+                iops=new_lun_data["r/s"] + new_lun_data["w/s"],
+                bandwidth=(new_lun_data["rkB/s"] + new_lun_data["wkB/s"]) / KILOBYTE_TO_MEGABYTE,
+                latency=mean([new_lun_data["r_await"], new_lun_data["w_await"]]),
+            )
+            lun_data.append(raw_lun)
+        # a pool none of whose luns is in the report has nothing to aggregate (and would fail the whole tick)
+        if not lun_data:
+            continue
+        pool_data = PoolData.create_pool_from_luns(lun_data, pool_name, timestamp)
+        pool_and_lun_data.append((lun_data, pool_data))
+    return pool_and_lun_data
+
+
+async def pool_and_lun_job(sink: Sink = write_rows):
     try:
         timestamp, iostat_information = await parse_iostat()
         pools = await get_pools_with_luns()
@@ -87,35 +187,11 @@ async def pool_and_lun_job():
         # we only support it now.
         await remove_replication_pool(pools)
 
-        for pool_name in pools:
-            lun_data: list[LUNData] = []
-            for lun_name in pools[pool_name]:
-                # ignore snapshot lun
-                if lun_name.endswith("_snp"):
-                    continue
-
-                new_lun_data = iostat_information.get(f"{pool_name}-{lun_name}")
-                if new_lun_data is None:
-                    continue
-                raw_lun = LUNData(
-                    name=lun_name if pool_name != "RAPIDSTORE" else f"cache@{lun_name}",
-                    time=timestamp,
-                    read_iops=new_lun_data["r/s"],
-                    write_iops=new_lun_data["w/s"],
-                    read_bandwidth=new_lun_data["rkB/s"] / KILOBYTE_TO_MEGABYTE,
-                    write_bandwidth=new_lun_data["wkB/s"] / KILOBYTE_TO_MEGABYTE,
-                    read_latency=new_lun_data["r_await"],
-                    write_latency=new_lun_data["w_await"],
-                    iops=new_lun_data["r/s"] + new_lun_data["w/s"],
-                    bandwidth=(new_lun_data["rkB/s"] + new_lun_data["wkB/s"]) / KILOBYTE_TO_MEGABYTE,
-                    latency=mean([new_lun_data["r_await"], new_lun_data["w_await"]]),
-                )
-                lun_data.append(raw_lun)
-            pool_data = PoolData.create_pool_from_luns(lun_data, pool_name, timestamp)
-            with get_session() as session:
-                session.add_all(lun_data)
-                session.add(pool_data)
-                session.commit()
+        rows: list[BasePerformanceModel] = []
+        for lun_data, pool_data in get_pool_and_lun_data(timestamp, iostat_information, pools):
+            rows.extend(lun_data)
+            rows.append(pool_data)
+        sink(rows)
 
     except Exception as e:
         print(str(e))
@@ -127,6 +203,11 @@ def clear_lun_performance_data(lun_name: str) -> None:
             session.begin()
             statement = delete(LUNData).where(LUNData.name == lun_name)  # type: ignore
             session.exec(statement)  # type: ignore
+            statement = delete(LatestValue).where(
+                LatestValue.source == LUNData.__tablename__, LatestValue.name == lun_name
+            )  # type: ignore
+            session.exec(statement)  # type: ignore
+            remove_from_catalog(session, LUNData, lun_name)
             session.commit()
             print(f"all data for {lun_name} is deleted")
 
@@ -141,6 +222,11 @@ def clear_pool_performance_data(pool_name: str) -> None:
             session.begin()
             statement = delete(PoolData).where(PoolData.name == pool_name)  # type: ignore
             session.exec(statement)  # type: ignore
+            statement = delete(LatestValue).where(
+                LatestValue.source == PoolData.__tablename__, LatestValue.name == pool_name
+            )  # type: ignore
+            session.exec(statement)  # type: ignore
+            remove_from_catalog(session, PoolData, pool_name)
             session.commit()
             print(f"all data for {pool_name} is deleted")
 
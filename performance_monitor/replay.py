@@ -0,0 +1,218 @@
+"""
+Offline ingest of recorded captures.
+
+Replays captured `iostat -Ntxdy` output (or `/proc/diskstats` snapshots), an `lvs --reportformat json` dump
+and sysfs FC counter dumps through the same transformation the collectors use, so incidents can be
+reproduced and queries benchmarked without real storage hardware.
+
+Snapshot files (`--diskstats`, `--fc`) hold one snapshot per tick, each preceded by a `# <iso timestamp>` line:
+
+    while true; do echo "# $(date -Iseconds)"; cat /proc/diskstats; sleep 5; done > diskstats.log
+    while true; do echo "# $(date -Iseconds)"; grep -H . /sys/kernel/scst_tgt/targets/qla2x00t/*/*_count*; sleep 5; done > fc.log
+
+`/proc/diskstats` names LVs by their kernel device (dm-N), so `--diskstats` also needs the device mapper names
+(the `<pool>-<lun>` names `iostat -N` reports), captured once alongside the snapshots:
+
+    grep -H . /sys/block/dm-*/dm/name > dm-names.txt
+
+usage:
+    python -m performance_monitor.replay --lvs lvs.json --iostat iostat.log --fc fc.log --speed 60
+    python -m performance_monitor.replay --lvs lvs.json --diskstats diskstats.log --dm-names dm-names.txt
+"""
+
+import argparse
+import asyncio
+import heapq
+import re
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from itertools import pairwise
+from pathlib import Path
+from time import time
+
+from performance_monitor.common_repo import BasePerformanceModel
+from performance_monitor.db import init_db
+from performance_monitor.ethernet_and_fiber_channel.ethernet_and_fiber_channel import get_pm_data
+from performance_monitor.ethernet_and_fiber_channel.model import RawFiberChannelData
+from performance_monitor.pool_and_lun.pool_and_lun import (
+    IOSTAT_TIMESTAMP_PATTERN,
+    get_iostat_from_diskstats,
+    get_pool_and_lun_data,
+    parse_diskstats,
+    parse_iostat_output,
+    parse_lvs_output,
+    remove_replication_pool,
+)
+from performance_monitor.writer import write_rows
+
+DEFAULT_BATCH_SIZE = 1_000
+
+Tick = tuple[datetime, list[BasePerformanceModel]]
+
+
+def split_iostat_reports(output: str) -> list[str]:
+    """
+    Split the output of a long running `iostat` into one report per timestamp.
+    """
+    reports: list[list[str]] = []
+    for line in output.split("\n"):
+        if re.search(IOSTAT_TIMESTAMP_PATTERN, line):
+            reports.append([])
+        if reports:
+            reports[-1].append(line)
+    return ["\n".join(report) for report in reports]
+
+
+def read_snapshots(path: Path) -> list[tuple[datetime, list[str]]]:
+    snapshots: list[tuple[datetime, list[str]]] = []
+    for line in path.read_text().splitlines():
+        if line.startswith("#"):
+            # captures are compared with the naive timestamps the collectors store
+            snapshots.append((datetime.fromisoformat(line[1:].strip()).replace(tzinfo=None), []))
+        elif snapshots and line.strip():
+            snapshots[-1][1].append(line)
+    return snapshots
+
+
+def parse_fc_counters(timestamp: datetime, lines: list[str]) -> dict[str, RawFiberChannelData]:
+    """
+    Parse `grep -H` style `<target dir>/<counter file>:<value>` lines into raw FC samples.
+    """
+    counters: dict[str, dict[str, int]] = {}
+    for line in lines:
+        file_path, value = line.rsplit(":", 1)
+        path = Path(file_path)
+        counters.setdefault(path.parent.name, {})[path.name] = int(value)
+    return {
+        wwn: RawFiberChannelData(
+            time=timestamp,
+            write_bandwidth=values["write_io_count_kb"],
+            read_bandwidth=values["read_io_count_kb"],
+            write_count=values["write_cmd_count"],
+            read_count=values["read_cmd_count"],
+        )
+        for wwn, values in counters.items()
+    }
+
+
+def parse_device_mapper_names(lines: list[str]) -> dict[str, str]:
+    """
+    Parse `grep -H` style `/sys/block/<dm-N>/dm/name:<name>` lines into kernel device names to device mapper names.
+    """
+    device_mapper_names: dict[str, str] = {}
+    for line in lines:
+        file_path, name = line.split(":", 1)
+        device_mapper_names[Path(file_path).parent.parent.name] = name.strip()
+    return device_mapper_names
+
+
+def get_pool_and_lun_tick(
+    timestamp: datetime, iostat_information: dict[str, dict], pools: dict[str, list[str]]
+) -> Tick:
+    rows: list[BasePerformanceModel] = []
+    for lun_data, pool_data in get_pool_and_lun_data(timestamp, iostat_information, pools):
+        rows.extend(lun_data)
+        rows.append(pool_data)
+    return timestamp, rows
+
+
+def iter_iostat_ticks(output: str, pools: dict[str, list[str]]) -> Iterator[Tick]:
+    for report in split_iostat_reports(output):
+        timestamp, iostat_information = parse_iostat_output(report)
+        yield get_pool_and_lun_tick(timestamp, iostat_information, pools)
+
+
+def parse_named_diskstats(lines: list[str], device_mapper_names: dict[str, str]) -> dict[str, list[int]]:
+    return {device_mapper_names.get(device, device): values for device, values in parse_diskstats(lines).items()}
+
+
+def iter_diskstats_ticks(
+    snapshots: list[tuple[datetime, list[str]]], pools: dict[str, list[str]], device_mapper_names: dict[str, str]
+) -> Iterator[Tick]:
+    for (previous_time, previous_lines), (timestamp, lines) in pairwise(snapshots):
+        iostat_information = get_iostat_from_diskstats(
+            parse_named_diskstats(previous_lines, device_mapper_names),
+            parse_named_diskstats(lines, device_mapper_names),
+            (timestamp - previous_time).total_seconds(),
+        )
+        yield get_pool_and_lun_tick(timestamp, iostat_information, pools)
+
+
+async def get_fc_ticks(snapshots: list[tuple[datetime, list[str]]]) -> list[Tick]:
+    ticks: list[Tick] = []
+    previous_raw_fc_data: dict[str, RawFiberChannelData] = {}
+    for timestamp, lines in snapshots:
+        current_raw_fc_data = parse_fc_counters(timestamp, lines)
+        if previous_raw_fc_data:
+            ticks.append((timestamp, await get_pm_data(current_raw_fc_data, previous_raw_fc_data, {}, {})))
+        previous_raw_fc_data = current_raw_fc_data
+    return ticks
+
+
+async def replay(ticks: Iterable[Tick], speed: float = 0, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Insert the rows of `ticks` in time order.
+
+    With `speed == 0` ticks are inserted as fast as possible, `batch_size` rows per transaction.
+    Otherwise the recorded clock is replayed `speed` times faster and every tick is committed on its own.
+    """
+    inserted = 0
+    buffer: list[BasePerformanceModel] = []
+    previous_time: datetime | None = None
+    for timestamp, rows in ticks:
+        if speed > 0:
+            if previous_time is not None:
+                await asyncio.sleep(max((timestamp - previous_time).total_seconds(), 0) / speed)
+            previous_time = timestamp
+        buffer.extend(rows)
+        if speed > 0 or len(buffer) >= batch_size:
+            write_rows(buffer)
+            inserted += len(buffer)
+            buffer = []
+    if buffer:
+        write_rows(buffer)
+        inserted += len(buffer)
+    return inserted
+
+
+async def main(args: argparse.Namespace) -> None:
+    init_db()
+    streams: list[Iterable[Tick]] = []
+    if args.iostat or args.diskstats:
+        pools = parse_lvs_output(args.lvs.read_text())
+        await remove_replication_pool(pools)
+        if args.iostat:
+            streams.append(iter_iostat_ticks(args.iostat.read_text(), pools))
+        if args.diskstats:
+            device_mapper_names = parse_device_mapper_names(args.dm_names.read_text().splitlines())
+            streams.append(iter_diskstats_ticks(read_snapshots(args.diskstats), pools, device_mapper_names))
+    if args.fc:
+        streams.append(await get_fc_ticks(read_snapshots(args.fc)))
+
+    now = time()
+    inserted = await replay(heapq.merge(*streams, key=lambda tick: tick[0]), args.speed, args.batch_size)
+    print(f"replay inserted {inserted} rows in {time() - now} seconds")
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Replay recorded iostat/lvs/FC captures into the monitoring database")
+    parser.add_argument("--lvs", type=Path, help="output of `lvs --reportformat json`")
+    parser.add_argument("--iostat", type=Path, help="output of a long running `iostat -Ntxdy <interval>`")
+    parser.add_argument("--diskstats", type=Path, help="timestamped /proc/diskstats snapshots")
+    parser.add_argument("--dm-names", type=Path, help="output of `grep -H . /sys/block/dm-*/dm/name` for --diskstats")
+    parser.add_argument("--fc", type=Path, help="timestamped sysfs FC target counter dumps")
+    parser.add_argument("--speed", type=float, default=0, help="clock acceleration factor, 0 means full speed")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per transaction")
+    return parser
+
+
+if __name__ == "__main__":
+    parser = get_parser()
+    arguments = parser.parse_args()
+    if (arguments.iostat or arguments.diskstats) and not arguments.lvs:
+        parser.error("--lvs is required to map iostat/diskstats devices to pools and LUNs")
+    if arguments.diskstats and not arguments.dm_names:
+        parser.error("--dm-names is required to map the dm-N devices of /proc/diskstats to their LVs")
+    if not (arguments.iostat or arguments.diskstats or arguments.fc):
+        parser.error("nothing to replay, pass at least one of --iostat, --diskstats or --fc")
+    asyncio.run(main(arguments))
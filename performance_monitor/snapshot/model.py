@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class LatestValue(SQLModel, table=True):
+    source: str = Field(primary_key=True)
+    name: str = Field(primary_key=True)
+    time: datetime
+    iops: float | None = None
+    bandwidth: float | None = None
+    latency: float | None = None
@@ -0,0 +1,140 @@
+import asyncio
+from collections.abc import Iterable
+from time import monotonic
+from typing import Any, Type
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, func, select
+
+from performance_monitor.common_repo import BasePerformanceModel
+from performance_monitor.config import REAL_TIME_INTERVAL
+from performance_monitor.db import get_async_session
+from performance_monitor.ethernet_and_fiber_channel.model import Ethernet, FiberChannel
+from performance_monitor.pool_and_lun.model import LUNData, PoolData
+from performance_monitor.snapshot.model import LatestValue
+
+VALUE_FIELDS = ("iops", "bandwidth", "latency")
+
+
+def update_latest_values(session: Session, rows: Iterable[BasePerformanceModel]) -> None:
+    """
+    Upsert the latest value of every row's entity in the same transaction as the row itself.
+    Older rows (e.g. a replay of past captures) never overwrite newer values.
+    """
+    upsert_latest_values(
+        session,
+        [
+            {
+                "source": row.__tablename__,
+                "name": row.name,
+                "time": row.time,
+                **{field_name: getattr(row, field_name, None) for field_name in VALUE_FIELDS},
+            }
+            for row in rows
+        ],
+    )
+
+
+def get_stored_latest_values(session: Session, model: Type[BasePerformanceModel], condition: Any) -> list[dict]:
+    """
+    Read the latest row of every entity of `model` matching `condition` from the performance table.
+    """
+    fields = [getattr(model, field_name) for field_name in VALUE_FIELDS if hasattr(model, field_name)]
+    # sqlite takes the bare columns of a max() aggregate from the row holding the maximum
+    statement = select(model.name, func.max(model.time), *fields).where(condition).group_by(model.name)
+    return [
+        {
+            "source": model.__tablename__,
+            "name": name,
+            "time": time,
+            **{field_name: None for field_name in VALUE_FIELDS},
+            **{field.key: value for field, value in zip(fields, values)},
+        }
+        for name, time, *values in session.execute(statement)
+    ]
+
+
+def resync_latest_values(session: Session, model: Type[BasePerformanceModel], condition: Any) -> None:
+    """
+    Recompute the latest values of `model` matching `condition` after rows were deleted,
+    and drop the entities that have no rows left. Each lookup is a range of the (name, time) primary key.
+    """
+    names = (
+        session.execute(select(LatestValue.name).where(LatestValue.source == model.__tablename__, condition))
+        .scalars()
+        .all()
+    )
+    if not names:
+        return
+    session.execute(
+        delete(LatestValue).where(
+            LatestValue.source == model.__tablename__,
+            LatestValue.name.in_(names),  # type: ignore
+        )
+    )
+    upsert_latest_values(session, get_stored_latest_values(session, model, model.name.in_(names)))  # type: ignore
+
+
+def backfill_latest_values(session: Session) -> None:
+    """
+    Record the latest value of every entity that already has rows, for databases created before the table existed.
+    """
+    for model in (Ethernet, FiberChannel, PoolData, LUNData):
+        upsert_latest_values(session, get_stored_latest_values(session, model, True))
+
+
+def upsert_latest_values(session: Session, values: list[dict[str, Any]]) -> None:
+    if not values:
+        return
+    statement = insert(LatestValue)
+    statement = statement.on_conflict_do_update(
+        index_elements=[LatestValue.source, LatestValue.name],
+        set_={
+            "time": statement.excluded.time,
+            "iops": statement.excluded.iops,
+            "bandwidth": statement.excluded.bandwidth,
+            "latency": statement.excluded.latency,
+        },
+        where=LatestValue.time <= statement.excluded.time,
+    )
+    session.execute(statement, values)
+
+
+class LatestValueIndex:
+    """
+    In-memory copy of the latest value table, reloaded at most once per collection interval.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[tuple[str, str], LatestValue] = {}
+        self.loaded_at = float("-inf")
+        self.lock = asyncio.Lock()
+
+    async def reload(self) -> None:
+        async with get_async_session() as session:
+            result_ = await session.execute(select(LatestValue))
+            self.values = {(value.source, value.name): value for value in result_.scalars().all()}
+        self.loaded_at = monotonic()
+
+    async def get_values(self) -> list[LatestValue]:
+        if monotonic() - self.loaded_at >= REAL_TIME_INTERVAL:
+            async with self.lock:
+                # another request may have reloaded while this one waited for the lock
+                if monotonic() - self.loaded_at >= REAL_TIME_INTERVAL:
+                    await self.reload()
+        return list(self.values.values())
+
+
+latest_value_index = LatestValueIndex()
+
+
+async def get_snapshot(sources: dict[str, str]) -> dict[str, list[dict[str, Any]]]:
+    """
+    Return the latest values grouped by the API name of their source, `sources` mapping table names to API names.
+    """
+    snapshot: dict[str, list[dict[str, Any]]] = {api_name: [] for api_name in sources.values()}
+    for value in await latest_value_index.get_values():
+        if value.source in sources:
+            snapshot[sources[value.source]].append(value.model_dump(exclude={"source"}))
+    return snapshot
@@ -0,0 +1,201 @@
+"""
+Cold start benchmark of the API and the collector.
+
+Every measurement starts a fresh interpreter in a scratch directory:
+
+- import time of `performance_monitor.monitor` and `performance_monitor.collector`
+- time to first response of `monitor.app`: from spawning the server until `/snapshot` answers
+- time to first tick of `collector.main`: from spawning the collector until it has committed its first rows
+
+An entrypoint that exits or does not get there within `--timeout` is reported as n/a.
+
+The first start of the API and of the collector runs against an empty database and creates the schema, the
+following ones reuse it. Both are reported, the median of the warm starts is the number to watch for regressions.
+
+usage:
+    python -m performance_monitor.startup_benchmark --runs 5
+"""
+
+import argparse
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections.abc import Callable
+from datetime import datetime
+from time import perf_counter, sleep
+
+import httpx
+
+IMPORT_SCRIPT = """
+import sys
+from time import perf_counter
+started = perf_counter()
+__import__(sys.argv[1])
+print(perf_counter() - started)
+"""
+
+# without iostat/lvs (e.g. on a workstation) the system check would exit, `--skip-system-check` disables it
+SERVER_SCRIPT = """
+import sys
+import uvicorn
+from performance_monitor import monitor
+if sys.argv[2] == "skip":
+    monitor.ensure_system_requirements = lambda: None
+uvicorn.run(monitor.app, port=int(sys.argv[1]), log_level="warning")
+"""
+
+COLLECTOR_SCRIPT = """
+import sys
+from performance_monitor import collector
+if sys.argv[1] == "skip":
+    collector.ensure_system_requirements = lambda: None
+collector.main()
+"""
+
+POLL_INTERVAL = 0.01
+
+
+def spawn(script: str, *args: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-c", script, *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def remove_database() -> None:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(f"monitoring.db{suffix}"):
+            os.remove(f"monitoring.db{suffix}")
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(module: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT, module],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def measure_first_response(system_check: str, timeout: float) -> float | None:
+    port = get_free_port()
+    started = perf_counter()
+    process = spawn(SERVER_SCRIPT, str(port), system_check)
+    try:
+        while perf_counter() - started < timeout:
+            if process.poll() is not None:
+                print(f"the API exited with code {process.returncode}")
+                return None
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/snapshot").status_code == 200:
+                    return perf_counter() - started
+            except httpx.TransportError:
+                pass
+            sleep(POLL_INTERVAL)
+        print(f"the API did not answer within {timeout} seconds")
+        return None
+    finally:
+        stop(process)
+
+
+def has_rows_since(moment: datetime) -> bool:
+    try:
+        with sqlite3.connect("monitoring.db") as conn:
+            # every tick the collectors write also updates the last-value index
+            return (
+                conn.execute("SELECT 1 FROM latestvalue WHERE time > ? LIMIT 1", (str(moment),)).fetchone() is not None
+            )
+    except sqlite3.OperationalError:
+        # the database or its tables are not created yet
+        return False
+
+
+def measure_first_tick(system_check: str, timeout: float) -> float | None:
+    moment = datetime.now()
+    started = perf_counter()
+    process = spawn(COLLECTOR_SCRIPT, system_check)
+    try:
+        while perf_counter() - started < timeout:
+            if process.poll() is not None:
+                print(f"the collector exited with code {process.returncode}")
+                return None
+            if has_rows_since(moment):
+                return perf_counter() - started
+            sleep(POLL_INTERVAL)
+        print(f"the collector did not write a tick within {timeout} seconds")
+        return None
+    finally:
+        stop(process)
+
+
+def print_row(label: str, values: list[float | None]) -> None:
+    if None in values:
+        print(f"{label:<32}{'n/a':>12}{'n/a':>12}{'n/a':>12}{'n/a':>12}")
+        return
+    warm = values[1:] or values
+    print(
+        f"{label:<32}{values[0] * 1000:>12.1f}{statistics.median(warm) * 1000:>12.1f}"
+        f"{min(warm) * 1000:>12.1f}{max(warm) * 1000:>12.1f}"
+    )
+
+
+def repeat(measurement: Callable[[], float | None], runs: int) -> list[float | None]:
+    values: list[float | None] = []
+    for _ in range(runs):
+        values.append(measurement())
+        # an entrypoint that failed once will fail again, no need to wait for its timeout on every run
+        if values[-1] is None:
+            break
+    return values
+
+
+def main(args: argparse.Namespace) -> None:
+    system_check = "skip" if args.skip_system_check else "run"
+    print(f"{'':<32}{'first ms':>12}{'median ms':>12}{'min ms':>12}{'max ms':>12}")
+    print_row("import monitor", repeat(lambda: measure_import("performance_monitor.monitor"), args.runs))
+    print_row("import collector", repeat(lambda: measure_import("performance_monitor.collector"), args.runs))
+    print_row(
+        "monitor.app first response", repeat(lambda: measure_first_response(system_check, args.timeout), args.runs)
+    )
+    # the API created the schema, so the collector starts from an empty database of its own
+    remove_database()
+    print_row("collector.main first tick", repeat(lambda: measure_first_tick(system_check, args.timeout), args.runs))
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Measure the cold start of the API and the collector")
+    parser.add_argument("--runs", type=int, default=5, help="starts of each entrypoint")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for a start")
+    parser.add_argument("--skip-system-check", action="store_true", help="start without iostat/lvs installed")
+    parser.add_argument("--workdir", help="directory for the scratch monitoring.db, a temporary one by default")
+    return parser
+
+
+if __name__ == "__main__":
+    arguments = get_parser().parse_args()
+    # the database path is relative, so moving into the scratch directory keeps the real database untouched
+    os.chdir(arguments.workdir or tempfile.mkdtemp(prefix="performance-monitor-startup-benchmark-"))
+    main(arguments)
@@ -0,0 +1,180 @@
+"""
+Runs every collector family in its own worker process.
+
+Workers only collect: the rows of every tick are sent over a bounded multiprocessing queue to the supervisor,
+which is the single writer to the database. Periodic jobs that write themselves (the cleaner) run in the supervisor
+between two writes for the same reason. Crashed workers are restarted with an exponential backoff that is
+reset once a worker stays up for `SUPERVISOR_STABLE_AFTER` seconds.
+"""
+
+import asyncio
+import ctypes
+import multiprocessing
+import os
+import queue
+import signal
+from collections.abc import Awaitable, Callable
+from time import monotonic
+
+from performance_monitor import db
+from performance_monitor.common_repo import BasePerformanceModel
+from performance_monitor.config import (
+    SUPERVISOR_MAX_BACKOFF,
+    SUPERVISOR_MIN_BACKOFF,
+    SUPERVISOR_QUEUE_SIZE,
+    SUPERVISOR_STABLE_AFTER,
+)
+from performance_monitor.ethernet_and_fiber_channel.model import Ethernet, FiberChannel
+from performance_monitor.pool_and_lun.model import LUNData, PoolData
+from performance_monitor.writer import Sink, write_rows
+
+# workers are forked so they can run the decorated collector closures without pickling them
+context = multiprocessing.get_context("fork")
+
+# from <linux/prctl.h>
+PR_SET_PDEATHSIG = 1
+
+Worker = Callable[[Sink], Awaitable[None]]
+# a job and the seconds between two of its runs
+PeriodicJob = tuple[Callable[[], None], float]
+# rows travel as plain dicts grouped by model, which pickles far smaller than ORM instances
+Message = list[tuple[str, list[dict]]]
+
+MODELS: dict[str, type[BasePerformanceModel]] = {
+    model.__name__: model for model in (LUNData, PoolData, FiberChannel, Ethernet)
+}
+
+
+def encode_rows(rows: list[BasePerformanceModel]) -> Message:
+    rows_per_model: dict[str, list[dict]] = {}
+    for row in rows:
+        rows_per_model.setdefault(type(row).__name__, []).append(row.model_dump())
+    return list(rows_per_model.items())
+
+
+def decode_rows(message: Message) -> list[BasePerformanceModel]:
+    return [MODELS[model_name](**values) for model_name, rows in message for values in rows]
+
+
+def exit_with_parent(parent_pid: int) -> None:
+    """
+    Have the kernel terminate this process when its parent dies, even if the parent is killed or crashes.
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.prctl(PR_SET_PDEATHSIG, signal.SIGTERM) != 0:
+        print(f"could not tie worker {os.getpid()} to the supervisor: {os.strerror(ctypes.get_errno())}")
+    # the parent may have died before the request was made
+    if os.getppid() != parent_pid:
+        os._exit(1)
+
+
+def run_worker(name: str, worker: Worker, rows_queue: multiprocessing.Queue, supervisor_pid: int) -> None:
+    def sink(rows: list[BasePerformanceModel]) -> None:
+        try:
+            rows_queue.put_nowait(encode_rows(rows))
+        except queue.Full:
+            print(f"{name} dropped a tick of {len(rows)} rows because the writer is behind")
+
+    # the supervisor decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # `daemon` only reaps workers when the supervisor exits normally, a killed supervisor must not leave them running
+    exit_with_parent(supervisor_pid)
+    # pooled connections inherited from the supervisor must not be shared with it
+    # through the module, the engines are rebound when the database path changes
+    db.sync_engine.dispose(close=False)
+    db.async_engine.sync_engine.dispose(close=False)
+    asyncio.run(worker(sink))
+
+
+class WorkerProcess:
+    def __init__(self, name: str, worker: Worker, rows_queue: multiprocessing.Queue) -> None:
+        self.name = name
+        self.worker = worker
+        self.rows_queue = rows_queue
+        self.process: multiprocessing.Process | None = None
+        self.started_at = 0.0
+        self.backoff = SUPERVISOR_MIN_BACKOFF
+        self.restart_at = 0.0
+
+    def start(self) -> None:
+        self.process = context.Process(
+            target=run_worker,
+            args=(self.name, self.worker, self.rows_queue, os.getpid()),
+            name=self.name,
+            daemon=True,
+        )
+        self.process.start()
+        self.started_at = monotonic()
+
+    def check(self) -> None:
+        """
+        Restart the worker if it died, once its backoff has passed.
+        """
+        now = monotonic()
+        if self.process is None:
+            if now >= self.restart_at:
+                print(f"supervisor is restarting {self.name}")
+                self.start()
+            return
+        if self.process.is_alive():
+            return
+
+        print(f"{self.name} exited with code {self.process.exitcode}")
+        if now - self.started_at >= SUPERVISOR_STABLE_AFTER:
+            self.backoff = SUPERVISOR_MIN_BACKOFF
+        self.restart_at = now + self.backoff
+        self.backoff = min(self.backoff * 2, SUPERVISOR_MAX_BACKOFF)
+        self.process = None
+
+    def stop(self) -> None:
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+
+def run_due_jobs(jobs: dict[str, PeriodicJob], next_runs: dict[str, float]) -> None:
+    for name, (job, interval) in jobs.items():
+        if monotonic() < next_runs[name]:
+            continue
+        next_runs[name] = monotonic() + interval
+        try:
+            job()
+        except Exception as e:
+            print(f"supervisor could not run {name}: {e}")
+
+
+def supervise(workers: dict[str, Worker], jobs: dict[str, PeriodicJob] | None = None) -> None:
+    rows_queue: multiprocessing.Queue = context.Queue(maxsize=SUPERVISOR_QUEUE_SIZE)
+    processes = [WorkerProcess(name, worker, rows_queue) for name, worker in workers.items()]
+    jobs = jobs or {}
+    # every job runs once right away, as the cleaner did when it was started
+    next_runs = {name: 0.0 for name in jobs}
+    stopping = False
+
+    def stop(*_) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for process in processes:
+        process.start()
+    try:
+        while not stopping:
+            try:
+                message = rows_queue.get(timeout=1)
+            except queue.Empty:
+                pass
+            else:
+                try:
+                    write_rows(decode_rows(message))
+                except Exception as e:
+                    print(f"supervisor could not write a tick: {e}")
+            run_due_jobs(jobs, next_runs)
+            for process in processes:
+                process.check()
+    finally:
+        for process in processes:
+            process.stop()
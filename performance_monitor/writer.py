@@ -0,0 +1,30 @@
+from collections.abc import Callable
+
+from sqlalchemy import insert
+
+from performance_monitor.anomaly.anomaly import detect_anomalies
+from performance_monitor.catalog.catalog import update_catalog
+from performance_monitor.common_repo import BasePerformanceModel
+from performance_monitor.db import get_session
+from performance_monitor.snapshot.snapshot import update_latest_values
+
+Sink = Callable[[list[BasePerformanceModel]], None]
+
+
+def write_rows(rows: list[BasePerformanceModel]) -> None:
+    """
+    Insert collected rows together with their anomaly events, latest values and catalog entries in one transaction.
+    """
+    if not rows:
+        return
+    rows_per_model: dict[type[BasePerformanceModel], list[dict]] = {}
+    for row in rows:
+        rows_per_model.setdefault(type(row), []).append(row.model_dump())
+    events = detect_anomalies(rows)
+    with get_session() as session:
+        for model, values in rows_per_model.items():
+            session.execute(insert(model), values)
+        session.add_all(events)
+        update_latest_values(session, rows)
+        update_catalog(session, rows)
+        session.commit()
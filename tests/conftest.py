@@ -0,0 +1,86 @@
+import asyncio
+import os
+import time
+from collections.abc import Callable
+from datetime import datetime
+
+import pytest
+
+from performance_monitor import db
+from performance_monitor.ethernet_and_fiber_channel.model import Ethernet
+from performance_monitor.pool_and_lun.model import LUNData
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """
+    An empty monitoring.db in a scratch directory.
+    """
+    monkeypatch.setattr(db, "async_engine", db.async_engine)
+    monkeypatch.setattr(db, "sync_engine", db.sync_engine)
+    db.set_database_path(str(tmp_path / "monitoring.db"))
+    db.async_engine.echo = False
+    db.init_db()
+    yield tmp_path
+    db.sync_engine.dispose()
+    asyncio.run(db.async_engine.dispose())
+
+
+@pytest.fixture
+def new_york_time():
+    """
+    Run in a local time zone that is not UTC, so aware and naive times of the same moment differ.
+    """
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "America/New_York"
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+
+@pytest.fixture
+def make_lun() -> Callable[..., LUNData]:
+    """
+    Build a LUN row, reads and writes split the totals evenly.
+    """
+
+    def make(name: str, time: datetime, iops: float = 2, bandwidth: float = 2, latency: float = 1) -> LUNData:
+        return LUNData(
+            name=name,
+            time=time,
+            read_iops=iops / 2,
+            write_iops=iops / 2,
+            read_bandwidth=bandwidth / 2,
+            write_bandwidth=bandwidth / 2,
+            read_latency=latency,
+            write_latency=latency,
+            iops=iops,
+            bandwidth=bandwidth,
+            latency=latency,
+        )
+
+    return make
+
+
+@pytest.fixture
+def make_port() -> Callable[..., Ethernet]:
+    """
+    Build an Ethernet row, sent and received split the totals evenly.
+    """
+
+    def make(name: str, time: datetime, bandwidth: float = 2) -> Ethernet:
+        return Ethernet(
+            name=name,
+            time=time,
+            bytes_sent=bandwidth / 2,
+            bytes_recv=bandwidth / 2,
+            bandwidth=bandwidth,
+            packets_sent=1,
+            packets_recv=1,
+        )
+
+    return make
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from performance_monitor import db
+from performance_monitor.anomaly.anomaly import COLLAPSE, SPIKE, AnomalyDetector
+from performance_monitor.config import ANOMALY_WARMUP_SAMPLES
+from performance_monitor.monitor import app
+
+
+def feed(detector: AnomalyDetector, kind: str, metric: str, values: list[float]):
+    return [detector.check("lundata", "lun1", datetime.now(), metric, kind, value) for value in values]
+
+
+def test_idle_series_does_not_flag_tiny_io():
+    events = feed(AnomalyDetector(), SPIKE, "latency", [0.0] * ANOMALY_WARMUP_SAMPLES + [0.01, 0.02, 0.5])
+
+    assert events == [None] * (ANOMALY_WARMUP_SAMPLES + 3)
+
+
+def test_latency_spike_is_flagged():
+    *events, event = feed(AnomalyDetector(), SPIKE, "latency", [0.5] * ANOMALY_WARMUP_SAMPLES + [20.0])
+
+    assert events == [None] * ANOMALY_WARMUP_SAMPLES
+    assert (event.kind, event.metric, event.value, event.expected) == (SPIKE, "latency", 20.0, 0.5)
+
+
+def test_collapse_is_only_flagged_from_a_noticeable_value():
+    *_, event = feed(AnomalyDetector(), COLLAPSE, "bandwidth", [100.0] * ANOMALY_WARMUP_SAMPLES + [0.0])
+    *_, idle_event = feed(AnomalyDetector(), COLLAPSE, "bandwidth", [0.5] * ANOMALY_WARMUP_SAMPLES + [0.0])
+
+    assert (event.kind, event.value) == (COLLAPSE, 0.0)
+    assert idle_event is None
+
+
+def test_events_start_with_a_timezone_is_compared_in_local_time(database, new_york_time):
+    now = datetime.now().replace(microsecond=0)
+    *_, event = feed(AnomalyDetector(), SPIKE, "latency", [0.5] * ANOMALY_WARMUP_SAMPLES + [20.0])
+    event.time = now - timedelta(minutes=30)
+    with db.get_session() as session:
+        session.add(event)
+        session.commit()
+    start = now - timedelta(hours=1)
+
+    naive = TestClient(app).get("/events", params={"start": str(start)})
+    aware = TestClient(app).get("/events", params={"start": start.astimezone(timezone.utc).isoformat()})
+
+    assert len(naive.json()) == len(aware.json()) == 1
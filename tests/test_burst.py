@@ -0,0 +1,57 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from performance_monitor import burst, monitor
+from performance_monitor.config import BURST_MAX_SESSIONS
+
+
+async def slow_sampler_factory(names: list[str]) -> burst.Sampler:
+    # building a real sampler awaits lvs and sysfs reads
+    await asyncio.sleep(0.05)
+
+    async def sample():
+        return []
+
+    return sample
+
+
+def test_concurrent_starts_do_not_exceed_the_session_limit():
+    async def start_concurrently():
+        results = await asyncio.gather(
+            *(burst.start_burst(slow_sampler_factory, ["lun1"], 100, 1) for _ in range(BURST_MAX_SESSIONS + 2)),
+            return_exceptions=True,
+        )
+        running = len(burst.burst_tasks)
+        await burst.stop_bursts()
+        return results, running
+
+    results, running = asyncio.run(start_concurrently())
+
+    assert running == BURST_MAX_SESSIONS
+    assert sum(isinstance(result, ValueError) for result in results) == 2
+    assert burst.reserved_sessions == 0
+
+
+def test_failing_sampler_factory_releases_its_slot_and_returns_503(monkeypatch):
+    async def failing_sampler_factory(names: list[str]) -> burst.Sampler:
+        raise Exception("lvs command not found")
+
+    monkeypatch.setattr(monitor, "get_lun_sampler", failing_sampler_factory)
+
+    response = TestClient(monitor.app).post("/burst/lun", params={"lun_name": "lun1"})
+
+    assert response.status_code == 503
+    assert "lvs command not found" in response.json()["detail"]
+    assert burst.reserved_sessions == 0
+
+
+def test_unknown_entities_are_rejected_with_422(monkeypatch):
+    async def sampler_factory(names: list[str]) -> burst.Sampler:
+        raise ValueError(f"none of {names} is a known LUN")
+
+    monkeypatch.setattr(monitor, "get_lun_sampler", sampler_factory)
+
+    response = TestClient(monitor.app).post("/burst/lun", params={"lun_name": "unknown"})
+
+    assert response.status_code == 422
@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import SQLModel, select
+
+from performance_monitor import db
+from performance_monitor.catalog.model import EntityCatalog
+from performance_monitor.ethernet_and_fiber_channel.model import Ethernet
+from performance_monitor.monitor import app
+
+
+def add_rows_without_catalog(rows: list[Ethernet]) -> None:
+    # rows written before the catalog existed
+    with db.get_session() as session:
+        session.add_all(rows)
+        session.commit()
+
+
+def test_upgrade_backfills_the_catalog_from_existing_rows(database, make_port):
+    now = datetime.now().replace(microsecond=0)
+    add_rows_without_catalog([make_port("eno1", now - timedelta(days=2)), make_port("eno1", now)])
+    with db.get_session() as session:
+        session.exec(text("PRAGMA user_version = 0"))  # type: ignore
+        session.commit()
+
+    db.init_db()
+
+    with db.get_session() as session:
+        [entity] = session.exec(select(EntityCatalog))
+    assert (entity.source, entity.name, entity.aliases) == ("ethernet", "eno1", "Primary")
+    assert (entity.first_seen, entity.last_seen) == (now - timedelta(days=2), now)
+
+
+def test_aliases_resolve_without_catalog_entries(database, make_port):
+    add_rows_without_catalog([make_port("eno1", datetime.now() - timedelta(minutes=1))])
+
+    [by_alias] = TestClient(app).get("/ethernet", params={"network_name": "Primary"}).json()
+    [by_name] = TestClient(app).get("/ethernet", params={"network_name": "eno1"}).json()
+
+    assert by_alias["data"] == by_name["data"]
+    assert by_alias["data"]["bandwidth"][-1] == 2
+
+
+def test_init_db_creates_every_table_when_only_db_is_imported(tmp_path):
+    database_path = tmp_path / "monitoring.db"
+    script = f"from performance_monitor import db; db.set_database_path({str(database_path)!r}); db.init_db()"
+
+    # a fresh interpreter, the test session has imported every model already
+    subprocess.run(
+        [sys.executable, "-c", script], check=True, env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    )
+
+    with sqlite3.connect(database_path) as conn:
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert tables == set(SQLModel.metadata.tables)
@@ -0,0 +1,62 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from performance_monitor import common_repo
+from performance_monitor.common_repo import get_batch_monitoring_data, get_monitoring_data, split_time_range
+from performance_monitor.pool_and_lun.model import LUNData
+from performance_monitor.writer import write_rows
+
+HISTORY = timedelta(days=2)
+
+
+@pytest.fixture
+def history(database, make_lun, make_port) -> tuple[datetime, datetime]:
+    """
+    Two days of rows every 5 minutes with integer totals, so the sums are exact whatever the chunking.
+    """
+    random.seed(0)
+    end = datetime.now().replace(microsecond=0)
+    rows = []
+    for tick in range(int(HISTORY / timedelta(minutes=5)) + 1):
+        time = end - timedelta(minutes=tick * 5)
+        rows.append(make_port("eno1", time))
+        rows.append(make_lun("lun1", time, random.randint(0, 1000), random.randint(0, 1000), random.randint(0, 10)))
+        # lun2 misses ticks, its buckets have to be padded and counted right
+        if tick % 7:
+            rows.append(make_lun("lun2", time, random.randint(0, 1000)))
+    write_rows(rows)
+    return end - HISTORY, end
+
+
+def use_parallelism(monkeypatch, parallelism: int) -> None:
+    monkeypatch.setattr(common_repo, "QUERY_PARALLELISM", parallelism)
+    monkeypatch.setattr(common_repo, "query_slots", asyncio.Semaphore(parallelism))
+
+
+@pytest.mark.parametrize("generation", range(6))
+@pytest.mark.parametrize("name", ["lun1", "lun2", ""])
+def test_parallel_chunks_match_a_single_query(history, monkeypatch, generation, name):
+    start, end = history
+    # fewer points than the buckets of the finest generations, so the merge has to keep the last ones
+    monkeypatch.setattr(common_repo, "MAX_POINT", 200)
+
+    use_parallelism(monkeypatch, 1)
+    single = asyncio.run(get_monitoring_data(name, LUNData, generation, start, end))
+    use_parallelism(monkeypatch, 8)
+    assert len(split_time_range(start, end)) == 8
+    parallel = asyncio.run(get_monitoring_data(name, LUNData, generation, start, end))
+
+    assert parallel == single
+
+
+def test_batch_with_repeated_names_shares_one_time_series(history, monkeypatch):
+    start, end = history
+    use_parallelism(monkeypatch, 8)
+
+    lun1, lun2, lun1_again = asyncio.run(get_batch_monitoring_data(["lun1", "lun2", "lun1"], LUNData, 1, start, end))
+
+    assert lun1 == lun1_again == asyncio.run(get_monitoring_data("lun1", LUNData, 1, start, end))
+    assert lun2 == asyncio.run(get_monitoring_data("lun2", LUNData, 1, start, end))
@@ -0,0 +1,95 @@
+import asyncio
+import socket
+import threading
+from time import perf_counter, sleep
+
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from performance_monitor import gateway
+
+NODE_TIMEOUT = 1
+
+
+def get_series(name: str, times: list[str], bandwidth: list[float]) -> list[dict]:
+    return [{"name": name, "data": {"time": times, "bandwidth": bandwidth}}]
+
+
+def get_stand_in_node(behaviour: str) -> FastAPI:
+    """
+    A stand-in for `monitor.app` that answers, fails or trickles its response.
+    """
+    node = FastAPI()
+
+    @node.get("/lun")
+    async def get_lun(lun_name: str):
+        if behaviour == "broken":
+            return StreamingResponse(iter([b"not json"]), status_code=500)
+        if behaviour == "trickle":
+            # every chunk arrives within the read timeout, the whole body does not
+            async def trickle():
+                for _ in range(NODE_TIMEOUT * 10):
+                    await asyncio.sleep(0.3)
+                    yield b" "
+                yield b"[]"
+
+            return StreamingResponse(trickle(), media_type="application/json")
+        return get_series(lun_name, ["10:00", "10:01"], [1.0, 2.0])
+
+    return node
+
+
+@pytest.fixture
+def start_nodes(monkeypatch):
+    servers: list[uvicorn.Server] = []
+
+    def start(*behaviours: str) -> list[str]:
+        urls = []
+        for behaviour in behaviours:
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+            server = uvicorn.Server(uvicorn.Config(get_stand_in_node(behaviour), port=port, log_level="warning"))
+            threading.Thread(target=server.run, daemon=True).start()
+            while not server.started:
+                sleep(0.01)
+            servers.append(server)
+            urls.append(f"http://127.0.0.1:{port}")
+        monkeypatch.setattr(gateway, "GATEWAY_NODES", urls)
+        monkeypatch.setattr(gateway, "GATEWAY_NODE_TIMEOUT", NODE_TIMEOUT)
+        return urls
+
+    yield start
+    for server in servers:
+        server.should_exit = True
+
+
+def test_series_of_every_node_are_merged(start_nodes):
+    nodes = start_nodes("ok", "ok")
+
+    with TestClient(gateway.app) as client:
+        response = client.get("/lun", params={"lun_name": "lun1"})
+
+    assert response.status_code == 200
+    assert "X-Missing-Nodes" not in response.headers
+    assert [(series["node"], series["data"]["time"]) for series in response.json()] == [
+        (node, ["10:00", "10:01"]) for node in nodes
+    ]
+
+
+@pytest.mark.parametrize("behaviour", ["broken", "trickle"])
+def test_failing_nodes_are_reported_within_the_timeout(start_nodes, behaviour):
+    bad_node, good_node = start_nodes(behaviour, "ok")
+
+    with TestClient(gateway.app) as client:
+        started = perf_counter()
+        response = client.get("/lun", params={"lun_name": "lun1"})
+        elapsed = perf_counter() - started
+
+    assert response.status_code == 200
+    assert response.headers["X-Missing-Nodes"] == bad_node
+    assert [series["node"] for series in response.json()] == [good_node]
+    assert elapsed < NODE_TIMEOUT + 0.5
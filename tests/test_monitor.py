@@ -0,0 +1,60 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from performance_monitor.monitor import app
+from performance_monitor.writer import write_rows
+
+
+def test_since_with_a_timezone_is_compared_in_local_time(database, make_lun):
+    now = datetime.now().replace(microsecond=0)
+    write_rows([make_lun("lun1", now - timedelta(minutes=minutes)) for minutes in range(10)])
+    since = (now - timedelta(minutes=3)).astimezone(timezone.utc)
+
+    naive = TestClient(app).get(
+        "/lun", params={"lun_name": "lun1", "generation": 1, "since": str(now - timedelta(minutes=3))}
+    )
+    aware = TestClient(app).get("/lun", params={"lun_name": "lun1", "generation": 1, "since": since.isoformat()})
+    zulu = TestClient(app).get(
+        "/lun", params={"lun_name": "lun1", "generation": 1, "since": since.strftime("%Y-%m-%dT%H:%M:%SZ")}
+    )
+
+    assert naive.status_code == aware.status_code == zulu.status_code == 200
+    assert aware.json() == zulu.json() == naive.json()
+    assert len(naive.json()[0]["data"]["time"]) == 4
+
+
+def test_etag_changes_only_with_a_new_tick(database, make_lun):
+    now = datetime.now().replace(microsecond=0)
+    write_rows([make_lun("lun1", now - timedelta(minutes=1)), make_lun("lun2", now - timedelta(minutes=1))])
+    client = TestClient(app)
+
+    totals = client.get("/lun")
+    named = client.get("/lun", params={"lun_name": "lun1"})
+    assert client.get("/lun", headers={"If-None-Match": totals.headers["ETag"]}).status_code == 304
+
+    write_rows([make_lun("lun2", now)])
+
+    assert client.get("/lun", headers={"If-None-Match": totals.headers["ETag"]}).status_code == 200
+    assert (
+        client.get("/lun", params={"lun_name": "lun1"}, headers={"If-None-Match": named.headers["ETag"]}).status_code
+        == 304
+    )
+
+
+@pytest.mark.parametrize("name", ["中文", 'a"b'])
+def test_etag_is_a_valid_header_for_any_name(database, make_lun, name):
+    write_rows([make_lun(name, datetime.now().replace(microsecond=0))])
+    client = TestClient(app)
+
+    response = client.get("/lun", params={"lun_name": name})
+
+    assert response.status_code == 200
+    assert response.json()[0]["name"] == name
+    assert re.fullmatch(r'W/"[\x21\x23-\x7e]*"', response.headers["ETag"])
+    assert (
+        client.get("/lun", params={"lun_name": name}, headers={"If-None-Match": response.headers["ETag"]}).status_code
+        == 304
+    )
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from sqlmodel import select
+
+from performance_monitor.db import get_session
+from performance_monitor.pool_and_lun.model import LUNData, PoolData
+from performance_monitor.pool_and_lun.pool_and_lun import parse_lvs_output
+from performance_monitor.replay import get_parser, iter_iostat_ticks, main, replay
+
+LVS_OUTPUT = json.dumps(
+    {
+        "report": [
+            {
+                "lv": [
+                    {"vg_name": "POOL1", "lv_name": "lun1", "lv_attr": "-wi-a-----"},
+                    {"vg_name": "POOL2", "lv_name": "lun2", "lv_attr": "-wi-a-----"},
+                ]
+            }
+        ]
+    }
+)
+
+IOSTAT_OUTPUT = """10/19/2026 10:00:00 AM
+Device:         r/s     w/s     rkB/s     wkB/s r_await w_await
+POOL1-lun1    10.00   20.00   1000.00   2000.00    1.00    3.00
+
+10/19/2026 10:00:05 AM
+Device:         r/s     w/s     rkB/s     wkB/s r_await w_await
+POOL1-lun1    30.00   40.00   3000.00   4000.00    2.00    4.00
+"""
+
+DISKSTATS_OUTPUT = """# 2026-10-19T10:00:00+00:00
+   8       0 sda 100 0 800 50 100 0 800 50 0 0 0
+ 253       0 dm-0 100 0 2000 100 200 0 4000 400 0 0 0
+# 2026-10-19T10:00:05+00:00
+   8       0 sda 150 0 1200 75 150 0 1200 75 0 0 0
+ 253       0 dm-0 150 0 3000 200 300 0 6000 800 0 0 0
+"""
+
+DM_NAMES_OUTPUT = """/sys/block/dm-0/dm/name:POOL1-lun1
+/sys/block/dm-1/dm/name:POOL2-lun2
+"""
+
+
+def test_replay_skips_pools_missing_from_the_report(database):
+    inserted = asyncio.run(replay(iter_iostat_ticks(IOSTAT_OUTPUT, parse_lvs_output(LVS_OUTPUT))))
+
+    assert inserted == 4
+    with get_session() as session:
+        assert [lun.name for lun in session.exec(select(LUNData))] == ["lun1", "lun1"]
+        pools = list(session.exec(select(PoolData).order_by(PoolData.time)))
+    assert [pool.name for pool in pools] == ["POOL1", "POOL1"]
+    assert pools[1].iops == 70
+    assert pools[1].latency == 3
+
+
+def test_replay_maps_diskstats_devices_to_lvs(database):
+    (database / "lvs.json").write_text(LVS_OUTPUT)
+    (database / "diskstats.log").write_text(DISKSTATS_OUTPUT)
+    (database / "dm-names.txt").write_text(DM_NAMES_OUTPUT)
+    arguments = get_parser().parse_args(
+        [
+            *("--lvs", str(database / "lvs.json")),
+            *("--diskstats", str(database / "diskstats.log")),
+            *("--dm-names", str(database / "dm-names.txt")),
+        ]
+    )
+
+    asyncio.run(main(arguments))
+
+    with get_session() as session:
+        [lun] = session.exec(select(LUNData))
+        [pool] = session.exec(select(PoolData))
+    assert (lun.name, lun.read_iops, lun.write_iops, lun.read_latency, lun.write_latency) == ("lun1", 10, 20, 2, 4)
+    assert pool.name == "POOL1"
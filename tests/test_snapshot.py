@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlmodel import select
+
+from performance_monitor import db
+from performance_monitor.cleaner_job import clean_forward_performance_monitor_data
+from performance_monitor.snapshot.model import LatestValue
+from performance_monitor.writer import write_rows
+
+
+def get_latest_values() -> dict[tuple[str, str], tuple[datetime, float | None, float | None, float | None]]:
+    with db.get_session() as session:
+        return {
+            (value.source, value.name): (value.time, value.iops, value.bandwidth, value.latency)
+            for value in session.exec(select(LatestValue))
+        }
+
+
+def test_forward_clean_recomputes_latest_values(database, make_lun):
+    now = datetime.now().replace(microsecond=0)
+    write_rows([make_lun("lun1", now - timedelta(days=2), 10), make_lun("lun1", now - timedelta(minutes=30), 20)])
+    write_rows([make_lun("lun2", now - timedelta(minutes=30), 30)])
+
+    clean_forward_performance_monitor_data(now - timedelta(hours=1))
+
+    assert get_latest_values() == {("lundata", "lun1"): (now - timedelta(days=2), 10, 2, 1)}
+
+
+def test_upgrade_backfills_latest_values_from_existing_rows(database, make_lun, make_port):
+    now = datetime.now().replace(microsecond=0)
+    with db.get_session() as session:
+        session.add_all([make_lun("lun1", now - timedelta(minutes=1), 10), make_lun("lun1", now, 20)])
+        session.add(make_port("eno1", now))
+        session.exec(text("PRAGMA user_version = 0"))  # type: ignore
+        session.commit()
+
+    db.init_db()
+
+    assert get_latest_values() == {
+        ("lundata", "lun1"): (now, 20, 2, 1),
+        ("ethernet", "eno1"): (now, None, 2, None),
+    }
@@ -0,0 +1,115 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+from datetime import datetime
+from time import monotonic, sleep
+
+import pytest
+from sqlmodel import select
+
+from performance_monitor import db
+from performance_monitor.db import get_session
+from performance_monitor.ethernet_and_fiber_channel.model import Ethernet
+from performance_monitor.supervisor import run_due_jobs, supervise
+
+
+@pytest.fixture
+def restore_signals():
+    handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGINT, signal.SIGTERM)}
+    yield
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+
+
+def test_due_jobs_run_once_per_interval_and_failures_are_contained():
+    calls: list[str] = []
+
+    def failing_job() -> None:
+        calls.append("failing")
+        raise Exception("database is locked")
+
+    jobs = {"job": (lambda: calls.append("job"), 3600.0), "failing": (failing_job, 0.0)}
+    next_runs = {"job": 0.0, "failing": 0.0}
+
+    run_due_jobs(jobs, next_runs)
+    run_due_jobs(jobs, next_runs)
+
+    assert calls == ["job", "failing", "failing"]
+
+
+def test_jobs_run_in_the_supervisor_between_writes(database, restore_signals, make_port):
+    supervisor_pid = os.getpid()
+    rows_seen_by_job: list[int] = []
+    job_pids: set[int] = set()
+
+    async def worker(sink) -> None:
+        sink([make_port("eno1", datetime.now())])
+
+    def job() -> None:
+        job_pids.add(os.getpid())
+        with get_session() as session:
+            rows_seen_by_job.append(len(session.exec(select(Ethernet)).all()))
+        if rows_seen_by_job[-1]:
+            os.kill(supervisor_pid, signal.SIGTERM)
+
+    supervise({"worker": worker}, {"job": (job, 0.0)})
+
+    assert job_pids == {supervisor_pid}
+    assert rows_seen_by_job[-1] == 1
+
+
+def is_running(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            # an orphan that exited stays a zombie until it is reaped, which may never happen in a container
+            return stat.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_workers_exit_when_the_supervisor_is_killed(tmp_path):
+    pid_file = tmp_path / "worker.pid"
+
+    async def worker(sink) -> None:
+        pid_file.write_text(str(os.getpid()))
+        while True:
+            await asyncio.sleep(1)
+
+    supervisor = multiprocessing.get_context("fork").Process(target=supervise, args=({"worker": worker},))
+    supervisor.start()
+    deadline = monotonic() + 10
+    while not pid_file.exists() or not pid_file.read_text():
+        assert monotonic() < deadline
+        sleep(0.01)
+    worker_pid = int(pid_file.read_text())
+
+    os.kill(supervisor.pid, signal.SIGKILL)
+    supervisor.join()
+
+    deadline = monotonic() + 10
+    try:
+        while is_running(worker_pid):
+            assert monotonic() < deadline, "the worker outlived the supervisor"
+            sleep(0.01)
+    finally:
+        if is_running(worker_pid):
+            os.kill(worker_pid, signal.SIGKILL)
+
+
+def test_workers_drop_the_connections_of_the_current_engines(database, restore_signals):
+    supervisor_pid = os.getpid()
+    pooled_file = database / "pooled"
+
+    async def worker(sink) -> None:
+        pooled_file.write_text(str(db.sync_engine.pool.checkedin()))
+
+    def job() -> None:
+        if pooled_file.exists():
+            os.kill(supervisor_pid, signal.SIGTERM)
+
+    # init_db left a connection in the pool of the engine bound to the scratch database
+    assert db.sync_engine.pool.checkedin() == 1
+    supervise({"worker": worker}, {"job": (job, 0.0)})
+
+    assert pooled_file.read_text() == "0"
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from performance_monitor.monitor import app
+from performance_monitor.writer import write_rows
+
+
+def test_start_with_a_timezone_is_compared_in_local_time(database, new_york_time, make_lun):
+    now = datetime.now().replace(microsecond=0)
+    write_rows([make_lun("lun1", now - timedelta(minutes=5))])
+    start = now - timedelta(minutes=10)
+
+    naive = TestClient(app).get("/lun/top", params={"start": str(start)})
+    aware = TestClient(app).get("/lun/top", params={"start": start.astimezone(timezone.utc).isoformat()})
+
+    assert naive.json() == aware.json() == [{"name": "lun1", "value": 2}]
+
+
+@pytest.fixture
+def ranked_luns(database, make_lun) -> datetime:
+    """
+    One sample a minute, oldest first: lun1 has the highest average bandwidth, lun2 the highest (and latest) peak.
+    """
+    now = datetime.now().replace(microsecond=0)
+    bandwidths = {"lun0": [10, 10, 10], "lun1": [50, 50, 50], "lun2": [0, 0, 120], "lun3": [20, 20, 20]}
+    write_rows(
+        [
+            make_lun(name, now - timedelta(minutes=len(values) - minute), bandwidth=bandwidth)
+            for name, values in bandwidths.items()
+            for minute, bandwidth in enumerate(values)
+        ]
+    )
+    return now
+
+
+def test_entities_are_ranked_by_their_average(ranked_luns):
+    response = TestClient(app).get("/lun/top", params={"metric": "bandwidth"})
+
+    assert response.json() == [
+        {"name": "lun1", "value": 50},
+        {"name": "lun2", "value": 40},
+        {"name": "lun3", "value": 20},
+        {"name": "lun0", "value": 10},
+    ]
+
+
+def test_entities_are_ranked_by_their_peak(ranked_luns):
+    response = TestClient(app).get("/lun/top", params={"metric": "bandwidth", "aggregation": "max"})
+
+    assert [entity["name"] for entity in response.json()] == ["lun2", "lun1", "lun3", "lun0"]
+    assert response.json()[0]["value"] == 120
+
+
+def test_count_keeps_only_the_largest(ranked_luns):
+    # entities are grouped by name, so lun0 enters the heap first and has to be replaced by lun2
+    response = TestClient(app).get("/lun/top", params={"metric": "bandwidth", "count": 2})
+
+    assert response.json() == [{"name": "lun1", "value": 50}, {"name": "lun2", "value": 40}]
+
+
+def test_the_time_range_limits_the_rows_ranked(ranked_luns):
+    # only the oldest sample of every LUN, where lun2 is still idle
+    end = ranked_luns - timedelta(minutes=2, seconds=30)
+
+    response = TestClient(app).get("/lun/top", params={"metric": "bandwidth", "end": str(end)})
+
+    assert [entity["name"] for entity in response.json()] == ["lun1", "lun3", "lun0", "lun2"]
+
+
+@pytest.mark.parametrize("path", ["/lun/top", "/pool/top", "/fibre-channel/top", "/ethernet/top"])
+def test_unknown_metric_is_rejected(database, path):
+    response = TestClient(app).get(path, params={"metric": "temperature"})
+
+    assert response.status_code == 422
+    assert "temperature" in response.json()["detail"]